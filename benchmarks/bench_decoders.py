@@ -0,0 +1,60 @@
+"""Compare the JSON decoder backends on active alert payloads.
+
+Usage: python -m benchmarks.bench_decoders [payload.json ...]
+
+Each payload is a recorded response of the avisos/ativos endpoint. Without
+payloads a synthetic national feed is decoded instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import timeit
+
+from custom_components.inmet.decoder import JSON_BACKENDS
+from custom_components.inmet.stream import AlertStreamParser, GeocodeFilter
+from fakes.feed import generate_feed
+
+CHUNK_SIZE = 64 * 1024
+
+
+def synthetic_payload() -> bytes:
+    """Return a synthetic national feed."""
+    return json.dumps(generate_feed(500, (400, 400), 0.5), ensure_ascii=False).encode()
+
+
+def stream_loads(data: bytes) -> dict:
+    """Decode with the streaming parser, keeping a single municipality."""
+    parser = AlertStreamParser(GeocodeFilter(["3500001"], []))
+    text = data.decode()
+    for start in range(0, len(text), CHUNK_SIZE):
+        parser.feed(text[start : start + CHUNK_SIZE])
+    return parser.close()
+
+
+def main() -> None:
+    """Print the mean decode time of every backend for every payload."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payloads", nargs="*", type=Path)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = {path.name: path.read_bytes() for path in args.payloads} or {
+        "synthetic": synthetic_payload()
+    }
+    backends = {**JSON_BACKENDS, "stream": stream_loads}
+
+    print(f"{'payload':<24} {'bytes':>10} {'backend':<8} {'ms':>9}")
+    for name, data in payloads.items():
+        for backend, loads in backends.items():
+            seconds = timeit.timeit(lambda: loads(data), number=args.number)
+            print(
+                f"{name:<24} {len(data):>10} {backend:<8}"
+                f" {seconds / args.number * 1000:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
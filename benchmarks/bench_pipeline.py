@@ -0,0 +1,351 @@
+"""Benchmark a poll of the feed pipeline, stage by stage.
+
+Usage: python -m benchmarks.bench_pipeline [payload.json ...] [--scale 1 10]
+
+Each payload, a recorded response of the avisos/ativos endpoint or a
+synthetic feed when none is given, is served by a stub session and run
+through InMetFeedManager.update() for 1, 10 and 100 subscribed
+municipalities. Every poll is timed first, then replayed under tracemalloc
+to measure the memory allocated by each stage, summing the growth of every
+allocating line between snapshots:
+
+- fetch: request and decode (streaming decode filters as well)
+- filter: indexing the payload and filtering the subscriptions
+- diff: comparing the filtered alerts with the managed entities
+- fan-out: entity create, update and remove callbacks
+
+A cold poll creates every entity, a warm poll repeats it unchanged.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Callable
+from contextlib import contextmanager
+import functools
+import json
+from pathlib import Path
+import statistics
+import time
+import tracemalloc
+
+from multidict import CIMultiDict
+
+from custom_components.inmet.api import InMetApiClient
+from custom_components.inmet.feed_manager import (
+    InMetFeed,
+    InMetFeedIndex,
+    InMetFeedManager,
+)
+
+from .bench_decoders import synthetic_payload
+
+STAGES = ("fetch", "filter", "diff", "fan-out")
+SUBSCRIPTIONS = (1, 10, 100)
+
+
+class StubContent:
+    """Response body stream."""
+
+    def __init__(self, body: bytes) -> None:
+        """Initialize the stream."""
+        self._body = body
+
+    async def iter_chunked(self, size: int):
+        """Yield the body in chunks."""
+        for start in range(0, len(self._body), size):
+            yield self._body[start : start + size]
+
+
+class StubResponse:
+    """Response of the stub session."""
+
+    status = 200
+
+    def __init__(self, body: bytes) -> None:
+        """Initialize the response."""
+        self.headers = CIMultiDict()
+        self.content = StubContent(body)
+        self._body = body
+
+    async def read(self) -> bytes:
+        """Return the body."""
+        return self._body
+
+    async def __aenter__(self) -> StubResponse:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+
+class StubSession:
+    """Session serving a fixed body to every request."""
+
+    def __init__(self, body: bytes) -> None:
+        """Initialize the session."""
+        self.body = body
+
+    def get(self, url: str, **kwargs) -> StubResponse:
+        """Return the response to a request."""
+        return StubResponse(self.body)
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    """Return a snapshot of the traced memory, leaving out tracemalloc itself."""
+    return tracemalloc.take_snapshot().filter_traces(
+        (tracemalloc.Filter(False, tracemalloc.__file__),)
+    )
+
+
+def allocated_since(snapshot: tracemalloc.Snapshot) -> int:
+    """Return the bytes gained by every line holding more than at a snapshot.
+
+    Memory released by other lines does not offset it, so stages freeing
+    the previous payload still report what they allocated.
+    """
+    return sum(
+        max(stat.size_diff, 0)
+        for stat in take_snapshot().compare_to(snapshot, "lineno")
+    )
+
+
+class StageFrame:
+    """Measurements of a running stage."""
+
+    def __init__(
+        self,
+        name: str,
+        now: float,
+        memory: int,
+        snapshot: tracemalloc.Snapshot | None,
+    ) -> None:
+        """Start measuring at a time, traced memory size and snapshot."""
+        self.name = name
+        self.seconds = 0.0
+        self.allocated = 0
+        self.peak = 0
+        self.grown = 0
+        self.resumed = now
+        self.memory = memory
+        self.snapshot = snapshot
+
+    def pause(self, now: float, trace_memory: bool) -> None:
+        """Stop measuring while a nested stage runs."""
+        self.seconds += now - self.resumed
+        if trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, self.grown + peak - self.memory)
+            self.grown += current - self.memory
+            self.allocated += allocated_since(self.snapshot)
+            self.snapshot = None
+
+    def resume(
+        self, now: float, memory: int, snapshot: tracemalloc.Snapshot | None
+    ) -> None:
+        """Measure again after a nested stage."""
+        self.resumed = now
+        self.memory = memory
+        self.snapshot = snapshot
+
+
+class StageRecorder:
+    """Collect time and memory per stage while a poll runs.
+
+    Stages may nest: the time and allocations of a nested stage are not
+    counted in the stage around it. Allocations are the growth of every
+    allocating line over the stage, peaks are relative to the traced memory
+    when the stage started.
+    """
+
+    def __init__(self, trace_memory: bool) -> None:
+        """Initialize the recorder."""
+        self.trace_memory = trace_memory
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.allocated = dict.fromkeys(STAGES, 0)
+        self.peak = dict.fromkeys(STAGES, 0)
+        self._stack: list[StageFrame] = []
+
+    def _memory(self) -> tuple[int, tracemalloc.Snapshot | None]:
+        """Return the traced memory size and a snapshot, resetting the peak."""
+        if not self.trace_memory:
+            return 0, None
+        snapshot = take_snapshot()
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0], snapshot
+
+    @contextmanager
+    def stage(self, name: str):
+        """Measure a stage."""
+        if self._stack:
+            self._stack[-1].pause(time.perf_counter(), self.trace_memory)
+        frame = StageFrame(name, time.perf_counter(), *self._memory())
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            frame.pause(time.perf_counter(), self.trace_memory)
+            self._stack.pop()
+            self.seconds[name] += frame.seconds
+            self.allocated[name] += frame.allocated
+            self.peak[name] = max(self.peak[name], frame.peak)
+            if self._stack:
+                self._stack[-1].resume(time.perf_counter(), *self._memory())
+
+
+def instrument(recorder: StageRecorder) -> Callable[[], None]:
+    """Wrap the pipeline methods in stages, return a function undoing it."""
+    patches = {
+        (InMetFeed, "_fetch_data"): "fetch",
+        (InMetFeedIndex, "__init__"): "filter",
+        (InMetFeedManager, "_filter_payload"): "filter",
+        (InMetFeedManager, "_diff_alerts"): "diff",
+        (InMetFeedManager, "_generate_new_entities"): "fan-out",
+        (InMetFeedManager, "_update_entities"): "fan-out",
+        (InMetFeedManager, "_remove_entities"): "fan-out",
+    }
+    originals = {}
+    for (cls, attribute), name in patches.items():
+        original = originals[cls, attribute] = getattr(cls, attribute)
+        if asyncio.iscoroutinefunction(original):
+
+            async def wrapper(*args, _original=original, _name=name, **kwargs):
+                with recorder.stage(_name):
+                    return await _original(*args, **kwargs)
+
+        else:
+
+            def wrapper(*args, _original=original, _name=name, **kwargs):
+                with recorder.stage(_name):
+                    return _original(*args, **kwargs)
+
+        setattr(cls, attribute, functools.wraps(original)(wrapper))
+
+    def restore() -> None:
+        for (cls, attribute), original in originals.items():
+            setattr(cls, attribute, original)
+
+    return restore
+
+
+def subscribed_codes(body: bytes, count: int) -> list[str]:
+    """Pick municipalities spread over the geocodes of a payload."""
+    payload = json.loads(body)
+    geocodes = sorted(
+        {
+            geocode
+            for key in ("hoje", "futuro")
+            for alert in payload.get(key, [])
+            for geocode in alert["geocodes"].split(",")
+        }
+    )
+    step = max(1, len(geocodes) // count)
+    return geocodes[::step][:count]
+
+
+async def poll_twice(
+    body: bytes, codes: list[str], streaming: bool, recorder_factory
+) -> list[StageRecorder]:
+    """Run a cold and a warm poll, returning their recorders."""
+
+    async def callback(alert_ids) -> None:
+        return None
+
+    feed = InMetFeed(InMetApiClient(StubSession(body)), streaming=streaming)
+    manager = InMetFeedManager(feed, callback, callback, callback, codes)
+    feed.register(manager)
+    recorders = []
+    for _ in ("cold", "warm"):
+        recorder = recorder_factory()
+        restore = instrument(recorder)
+        try:
+            # Drop the index so the manager fetches, as the coordinator does.
+            feed._index = None
+            await manager.update()
+        finally:
+            restore()
+        recorders.append(recorder)
+    manager.stop()
+    return recorders
+
+
+def run(body: bytes, codes: list[str], streaming: bool, repeat: int) -> list[dict]:
+    """Return the median time and the memory per stage of both polls."""
+    timings = [
+        asyncio.run(poll_twice(body, codes, streaming, lambda: StageRecorder(False)))
+        for _ in range(repeat)
+    ]
+    tracemalloc.start()
+    try:
+        traced = asyncio.run(
+            poll_twice(body, codes, streaming, lambda: StageRecorder(True))
+        )
+    finally:
+        tracemalloc.stop()
+
+    results = []
+    for poll, memory in enumerate(traced):
+        results.append(
+            {
+                stage: (
+                    statistics.median(run[poll].seconds[stage] for run in timings),
+                    memory.allocated[stage],
+                    memory.peak[stage],
+                )
+                for stage in STAGES
+            }
+        )
+    return results
+
+
+def scaled(body: bytes, factor: int) -> bytes:
+    """Repeat the alerts of a payload under new ids."""
+    if factor == 1:
+        return body
+    payload = json.loads(body)
+    for key in ("hoje", "futuro"):
+        alerts = payload.get(key, [])
+        payload[key] = [
+            {**alert, "id": f"{alert['id']}-{copy}"}
+            for copy in range(factor)
+            for alert in alerts
+        ]
+    return json.dumps(payload, ensure_ascii=False).encode()
+
+
+def main() -> None:
+    """Print the stage table of every payload and subscription count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("payloads", nargs="*", type=Path)
+    parser.add_argument("--scale", nargs="+", type=int, default=[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-streaming", dest="streaming", action="store_false")
+    args = parser.parse_args()
+
+    payloads = {path.name: path.read_bytes() for path in args.payloads} or {
+        "synthetic": synthetic_payload()
+    }
+
+    print(
+        f"{'payload':<20} {'bytes':>10} {'subs':>4} {'poll':<4} {'stage':<7}"
+        f" {'ms':>8} {'alloc KiB':>10} {'peak KiB':>10}"
+    )
+    for name, recorded in payloads.items():
+        for factor in args.scale:
+            body = scaled(recorded, factor)
+            label = name if factor == 1 else f"{name} x{factor}"
+            for count in SUBSCRIPTIONS:
+                codes = subscribed_codes(body, count)
+                results = run(body, codes, args.streaming, args.repeat)
+                for poll, stages in zip(("cold", "warm"), results):
+                    for stage, (seconds, allocated, peak) in stages.items():
+                        print(
+                            f"{label:<20} {len(body):>10} {count:>4} {poll:<4}"
+                            f" {stage:<7} {seconds * 1000:>8.2f}"
+                            f" {allocated / 1024:>10.1f} {peak / 1024:>10.1f}"
+                        )
+
+
+if __name__ == "__main__":
+    main()
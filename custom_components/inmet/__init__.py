@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
 from collections.abc import Callable
 from datetime import datetime, timedelta
 import logging
+from typing import Any
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -12,21 +16,104 @@ from homeassistant.const import (
     CONF_LATITUDE,
     CONF_LONGITUDE,
     CONF_SCAN_INTERVAL,
-    UnitOfLength,
 )
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers import aiohttp_client
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.helpers import aiohttp_client, config_validation as cv
 from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.util.unit_conversion import DistanceConverter
-from homeassistant.util.unit_system import US_CUSTOMARY_SYSTEM
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, FEED, PLATFORMS  # noqa: F401
-from .feed_manager import InMetFeedManager
+from .api import API_BASE_URL, InMetApiClient
+from .cache import TTLCache
+from .const import (  # noqa: F401
+    ALERT_LOOKAHEAD,
+    API_CLIENT,
+    ATTR_POLL_NOW,
+    CONF_BASE_URL,
+    CONF_CODES,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PREFIXES,
+    COORDINATOR,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DOMAIN,
+    FEED,
+    MAX_BACKOFF_STEPS,
+    PLATFORMS,
+    SEARCH_CACHE,
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_TTL,
+    SERVICE_PROFILE_NEXT_POLL,
+    SNAPSHOT_SAVE_DELAY,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+)
+from .feed_manager import InMetFeed, InMetFeedManager, parse_alert_time
+from .metrics import PollHistory
+from .profiler import async_get_profiler
 from .status_update import StatusUpdate
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = vol.Schema(
+    {DOMAIN: vol.Schema({vol.Optional(CONF_BASE_URL, default=API_BASE_URL): cv.url})},
+    extra=vol.ALLOW_EXTRA,
+)
+
+PROFILE_NEXT_POLL_SCHEMA = vol.Schema(
+    {vol.Optional(ATTR_POLL_NOW, default=False): cv.boolean}
+)
+
+
+@callback
+def async_get_api_client(hass: HomeAssistant) -> InMetApiClient:
+    """Return the InMet API client shared by the feed and the config flow."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if API_CLIENT not in data:
+        data[API_CLIENT] = InMetApiClient(
+            aiohttp_client.async_get_clientsession(hass),
+            data.get(CONF_BASE_URL, API_BASE_URL),
+        )
+    return data[API_CLIENT]
+
+
+@callback
+def async_get_search_cache(hass: HomeAssistant) -> TTLCache:
+    """Return the city search cache shared by all config flows."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if SEARCH_CACHE not in data:
+        data[SEARCH_CACHE] = TTLCache(
+            SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL.total_seconds()
+        )
+    return data[SEARCH_CACHE]
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the InMet component from configuration.yaml."""
+    if DOMAIN in config:
+        base_url = config[DOMAIN][CONF_BASE_URL]
+        if base_url != API_BASE_URL:
+            _LOGGER.warning("Using the InMet API at %s", base_url)
+        hass.data.setdefault(DOMAIN, {})[CONF_BASE_URL] = base_url
+
+    async def async_profile_next_poll(call: ServiceCall) -> None:
+        """Profile the next poll of the feed, now if asked to."""
+        async_get_profiler(hass).async_request()
+        coordinator = hass.data[DOMAIN].get(COORDINATOR)
+        if call.data[ATTR_POLL_NOW] and coordinator is not None:
+            await coordinator.async_update()
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE_NEXT_POLL,
+        async_profile_next_poll,
+        schema=PROFILE_NEXT_POLL_SCHEMA,
+    )
+    return True
+
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     """Set up the InMet component as config entry."""
@@ -34,84 +121,267 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
     hass.data.setdefault(DOMAIN, {})
     feeds = hass.data[DOMAIN].setdefault(FEED, {})
 
-    city_code = config_entry.data[CONF_CODE]
-    if hass.config.units is US_CUSTOMARY_SYSTEM:
-        city_code = DistanceConverter.convert(
-            city_code, UnitOfLength.MILES, UnitOfLength.KILOMETERS
-        )
+    # All config entries share a single download of the national feed.
+    coordinator = hass.data[DOMAIN].get(COORDINATOR)
+    if coordinator is None:
+        coordinator = hass.data[DOMAIN][COORDINATOR] = InMetFeedCoordinator(hass)
+    await coordinator.async_load()
     # Create feed entity manager for all platforms.
-    manager = InMetEntityManager(hass, config_entry, city_code)
+    manager = InMetEntityManager(hass, config_entry, coordinator)
     feeds[config_entry.entry_id] = manager
+    coordinator.async_register(manager)
     _LOGGER.debug("Feed entity manager added for %s", config_entry.entry_id)
-    await manager.async_init()
+    await manager.async_init(coordinator.snapshot(config_entry.entry_id))
+    config_entry.async_on_unload(config_entry.add_update_listener(async_reload_entry))
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(config_entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload an InMet component config entry."""
     _LOGGER.debug("Unloading InMet alerts (async_unload_entry): %s", DOMAIN)
     manager: InMetEntityManager = hass.data[DOMAIN][FEED].pop(entry.entry_id)
+    coordinator: InMetFeedCoordinator = hass.data[DOMAIN][COORDINATOR]
+    coordinator.async_unregister(manager)
+    if not hass.data[DOMAIN][FEED]:
+        coordinator.async_stop()
+        hass.data[DOMAIN].pop(COORDINATOR)
     await manager.async_stop()
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
+class InMetFeedCoordinator:
+    """Poll the national InMet feed once for all config entries."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the feed coordinator."""
+        self._hass = hass
+        self.feed = InMetFeed(async_get_api_client(hass))
+        self._managers: list[InMetEntityManager] = []
+        self._scan_interval: timedelta | None = None
+        self._track_time_remove_callback: Callable[[], None] | None = None
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._load_lock = asyncio.Lock()
+        self._snapshot: dict[str, dict[str, Any]] | None = None
+
+    async def async_load(self) -> None:
+        """Load the snapshot saved by the previous run."""
+        async with self._load_lock:
+            if self._snapshot is not None:
+                return
+            data = await self._store.async_load() or {}
+            self.feed.restore_validators(data.get("etag"), data.get("last_modified"))
+            self._snapshot = data.get("entries", {})
+
+    def snapshot(self, entry_id: str) -> list[dict] | None:
+        """Return the saved alerts of a config entry.
+
+        Only while the feed validators are the ones the alerts were saved
+        with: a not modified response would otherwise keep older alerts.
+        """
+        saved = (self._snapshot or {}).get(entry_id)
+        # Snapshots saved by older versions hold no validators.
+        if not isinstance(saved, dict):
+            return None
+        validators = self.feed.validators
+        if any(saved.get(key) != value for key, value in validators.items()):
+            _LOGGER.debug("Dropping outdated snapshot of %s", entry_id)
+            return None
+        return saved.get("alerts")
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the snapshot once the burst of updates settles."""
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the validators and the filtered alerts of every entry.
+
+        Each snapshot keeps the validators of the feed it was filtered from.
+        """
+        entry_ids = {
+            entry.entry_id for entry in self._hass.config_entries.async_entries(DOMAIN)
+        }
+        # Keep snapshots of entries that are configured but not set up yet.
+        entries = {
+            entry_id: saved
+            for entry_id, saved in (self._snapshot or {}).items()
+            if entry_id in entry_ids
+        }
+        for manager in self._managers:
+            alerts = manager.feed_manager.snapshot()
+            if alerts is not None:
+                entries[manager.config_entry_id] = {
+                    **self.feed.validators,
+                    "alerts": alerts,
+                }
+        self._snapshot = entries
+        return {**self.feed.validators, "entries": entries}
+
+    @callback
+    def async_register(self, manager: InMetEntityManager) -> None:
+        """Register an entity manager with the shared feed."""
+        self._managers.append(manager)
+        self.feed.register(manager.feed_manager)
+        self._async_schedule()
+
+    @callback
+    def async_unregister(self, manager: InMetEntityManager) -> None:
+        """Deregister an entity manager from the shared feed."""
+        if manager in self._managers:
+            self._managers.remove(manager)
+        self.feed.unregister(manager.feed_manager)
+        self._async_schedule()
+
+    @callback
+    def async_reschedule(self) -> None:
+        """Apply a change of the scan interval requested by a manager."""
+        self._async_schedule()
+
+    async def async_update(self) -> None:
+        """Refresh the shared feed."""
+        async with async_get_profiler(self._hass).async_profile():
+            await self.feed.update()
+        _LOGGER.debug("Feed coordinator updated")
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop refreshing the shared feed."""
+        if self._track_time_remove_callback:
+            self._track_time_remove_callback()
+            self._track_time_remove_callback = None
+        self._scan_interval = None
+        _LOGGER.debug("Feed coordinator stopped")
+
+    @callback
+    def _async_schedule(self) -> None:
+        """Poll at the shortest interval requested by the registered managers."""
+        if not self._managers:
+            self.async_stop()
+            return
+
+        scan_interval = min(manager.scan_interval for manager in self._managers)
+        if scan_interval == self._scan_interval:
+            return
+
+        self.async_stop()
+
+        async def update(event_time: datetime) -> None:
+            """Update."""
+            await self.async_update()
+
+        # Trigger updates at regular intervals.
+        self._track_time_remove_callback = async_track_time_interval(
+            self._hass, update, scan_interval
+        )
+        self._scan_interval = scan_interval
+
+
 class InMetEntityManager:
     """Feed Entity Manager for InMet feed."""
 
     def __init__(
-        self, hass: HomeAssistant, config_entry: ConfigEntry, radius_in_km: float
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        coordinator: InMetFeedCoordinator,
     ) -> None:
         """Initialize the Feed Entity Manager."""
         self._hass = hass
         self._config_entry = config_entry
+        self._coordinator = coordinator
 
-        city_code = config_entry.data[CONF_CODE]
-        websession = aiohttp_client.async_get_clientsession(hass)
+        # Entries created before multi-municipality support only hold CONF_CODE.
+        city_codes = config_entry.data.get(CONF_CODES)
+        if city_codes is None:
+            city_codes = [config_entry.data[CONF_CODE]]
 
         self._feed_manager = InMetFeedManager(
-            websession,
-            self._generate_entity,
+            coordinator.feed,
+            self._generate_entities,
             self._update_entity,
             self._remove_entity,
-            city_code,
+            city_codes,
             status_async_callback=self._status_update,
+            geocode_prefixes=config_entry.data.get(CONF_PREFIXES),
         )
         self._config_entry_id = config_entry.entry_id
-        self._scan_interval = timedelta(seconds=config_entry.data[CONF_SCAN_INTERVAL])
-        self._track_time_remove_callback: Callable[[], None] | None = None
+        self._base_scan_interval = timedelta(
+            seconds=config_entry.data[CONF_SCAN_INTERVAL]
+        )
+        # The limits of the adaptive interval are set in the options flow.
+        config = {**config_entry.data, **config_entry.options}
+        self._min_scan_interval = timedelta(
+            seconds=config.get(
+                CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL.total_seconds()
+            )
+        )
+        self._max_scan_interval = timedelta(
+            seconds=config.get(
+                CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL.total_seconds()
+            )
+        )
+        self._scan_interval = self._base_scan_interval
+        self._quiet_polls = 0
         self._status_info: StatusUpdate | None = None
+        self._poll_history = PollHistory()
         self.listeners: list[Callable[[], None]] = []
 
-    async def async_init(self) -> None:
-        """Schedule initial and regular updates based on configured time interval."""
+    @property
+    def feed_manager(self) -> InMetFeedManager:
+        """Return the feed manager of this config entry."""
+        return self._feed_manager
+
+    @property
+    def config_entry_id(self) -> str:
+        """Return the config entry id."""
+        return self._config_entry_id
+
+    @property
+    def poll_history(self) -> PollHistory:
+        """Return the metrics of the latest polls."""
+        return self._poll_history
+
+    @property
+    def scan_interval(self) -> timedelta:
+        """Return the current, adaptive, scan interval."""
+        return self._scan_interval
+
+    async def async_init(self, snapshot: list[dict] | None = None) -> None:
+        """Set up the platforms; regular updates come from the feed coordinator."""
+        # Held before the platform setup schedules the first update, so that
+        # update is conditional and cannot be overwritten by the snapshot.
+        if snapshot is not None:
+            self._feed_manager.load_snapshot(snapshot)
 
         await self._hass.config_entries.async_forward_entry_setups(
             self._config_entry, PLATFORMS
         )
 
-        async def update(event_time: datetime) -> None:
-            """Update."""
-            await self.async_update()
-
-        # Trigger updates at regular intervals.
-        self._track_time_remove_callback = async_track_time_interval(
-            self._hass, update, self._scan_interval
-        )
+        # Show the alerts of the previous run right away, the platform setup
+        # already scheduled the update that reconciles them with the feed.
+        if snapshot is not None:
+            await self._feed_manager.restore()
 
         _LOGGER.debug("Feed entity manager initialized")
 
     async def async_update(self) -> None:
         """Refresh data."""
-        await self._feed_manager.update()
+        async with async_get_profiler(self._hass).async_profile():
+            await self._feed_manager.update()
         _LOGGER.debug("Feed entity manager updated")
 
     async def async_stop(self) -> None:
         """Stop this feed entity manager from refreshing."""
+        self._feed_manager.stop()
         for unsub_dispatcher in self.listeners:
             unsub_dispatcher()
         self.listeners = []
-        if self._track_time_remove_callback:
-            self._track_time_remove_callback()
         _LOGGER.debug("Feed entity manager stopped")
 
     @callback
@@ -127,14 +397,14 @@ class InMetEntityManager:
         """Return latest status update info received."""
         return self._status_info
 
-    async def _generate_entity(self, alert_id: str) -> None:
-        """Generate new entity."""
+    async def _generate_entities(self, alert_ids: list[str]) -> None:
+        """Generate new entities in a single batch."""
         async_dispatcher_send(
             self._hass,
             self.async_event_new_entity(),
             self,
             self._config_entry.unique_id,
-            alert_id,
+            alert_ids,
         )
 
     async def _update_entity(self, alert_id: str) -> None:
@@ -149,7 +419,49 @@ class InMetEntityManager:
         """Propagate status update."""
         _LOGGER.debug("Status update received: %s", status_info)
         self._status_info = status_info
+        self._poll_history.add(status_info.metrics)
         async_dispatcher_send(self._hass, f"inmet_status_{self._config_entry_id}")
+        self._coordinator.async_schedule_save()
+        self._async_adapt_scan_interval(status_info)
+
+    @callback
+    def _async_adapt_scan_interval(self, status_info: StatusUpdate) -> None:
+        """Poll faster around alerts and back off while the feed is quiet."""
+        if status_info.last_update != status_info.last_update_successful:
+            # Failed polls are left to the retry policy and the circuit breaker,
+            # backing off here would delay the recovery.
+            return
+        now = dt_util.now()
+        if any(
+            self._is_active_or_soon(alert, now) for alert in self._feed_manager.alerts()
+        ):
+            self._quiet_polls = 0
+            scan_interval = self._min_scan_interval
+        elif status_info.created or status_info.updated or status_info.removed:
+            self._quiet_polls = 0
+            scan_interval = self._base_scan_interval
+        else:
+            self._quiet_polls = min(self._quiet_polls + 1, MAX_BACKOFF_STEPS)
+            scan_interval = self._base_scan_interval * 2**self._quiet_polls
+
+        scan_interval = max(
+            self._min_scan_interval, min(self._max_scan_interval, scan_interval)
+        )
+        if scan_interval != self._scan_interval:
+            _LOGGER.debug("Scan interval changed to %s", scan_interval)
+            self._scan_interval = scan_interval
+            self._coordinator.async_reschedule()
+
+    @staticmethod
+    def _is_active_or_soon(alert: dict, now: datetime) -> bool:
+        """Return True if an alert is running or starts within the lookahead."""
+        end = parse_alert_time(alert.get("fim"))
+        if end is not None and end <= now:
+            return False
+        if not alert.get("future"):
+            return True
+        start = parse_alert_time(alert.get("inicio"))
+        return start is None or start - now <= ALERT_LOOKAHEAD
 
     def latitude(self) -> float | None:
         """Get the latitude."""
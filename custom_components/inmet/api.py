@@ -0,0 +1,66 @@
+"""Client for the InMet API."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import aiohttp
+from aiohttp import ClientResponse, ClientSession
+
+from .decoder import async_decode_json, get_json_loads
+
+_LOGGER = logging.getLogger(__name__)
+
+API_BASE_URL = "https://apiprevmet3.inmet.gov.br"
+ALERTS_PATH = "/avisos/ativos"
+AUTOCOMPLETE_PATH = "/autocomplete/{name}"
+
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=10)
+
+
+class InMetApiClient:
+    """HTTP client for the InMet API.
+
+    Runs on a shared, pooled session (Home Assistant's), so every call reuses
+    its keep-alive connections, connection limits and DNS cache. Responses
+    are decoded with the fastest installed JSON backend unless one is given.
+    """
+
+    def __init__(
+        self,
+        websession: ClientSession,
+        base_url: str = API_BASE_URL,
+        timeout: aiohttp.ClientTimeout = REQUEST_TIMEOUT,
+        json_backend: str | None = None,
+    ) -> None:
+        """Initialize the client."""
+        self._websession = websession
+        self._base_url = base_url.rstrip("/")
+        self._timeout = timeout
+        self._loads = get_json_loads(json_backend)
+
+    def get(self, path: str, **kwargs: Any):
+        """Return a GET request context manager for an API path."""
+        kwargs.setdefault("timeout", self._timeout)
+        return self._websession.get(f"{self._base_url}{path}", **kwargs)
+
+    async def json(self, response: ClientResponse) -> Any:
+        """Read and decode a JSON response, off the event loop if large."""
+        return await self.decode(await response.read())
+
+    async def decode(self, data: bytes) -> Any:
+        """Decode a JSON body, off the event loop if large."""
+        return await async_decode_json(data, self._loads)
+
+    async def search_city(self, name: str) -> list | None:
+        """Search the city using the inmet autocomplete endpoint."""
+        try:
+            async with self.get(AUTOCOMPLETE_PATH.format(name=name)) as response:
+                if response.status != 200:
+                    _LOGGER.error("Failed to search city: %s", name)
+                    return None
+                return await self.json(response)
+        except (aiohttp.ClientError, TimeoutError, ValueError) as err:
+            _LOGGER.error("Error fetching city details: %s", err)
+            return None
@@ -0,0 +1,58 @@
+"""Bounded cache with expiry for the InMet integration."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+import time
+from typing import Any
+
+
+class TTLCache:
+    """Least recently used cache whose entries expire after a time to live."""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the cache, ttl is in seconds."""
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._timer = timer
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached entries, expired or not."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return a live entry and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._timer():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store an entry, evicting the least recently used beyond maxsize."""
+        self._entries[key] = (self._timer() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """Return the cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self._maxsize,
+        }
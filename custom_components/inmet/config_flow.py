@@ -3,10 +3,14 @@
 import logging
 from typing import Any
 
-import aiohttp
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import (
     CONF_CODE,
     CONF_LATITUDE,
@@ -14,11 +18,33 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_SCAN_INTERVAL,
 )
+from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 
-from .const import DEFAULT_NAME, DEFAULT_SCAN_INTERVAL, DOMAIN, MAX_CITIES
+from . import async_get_api_client, async_get_search_cache
+from .const import (
+    CONF_CODES,
+    CONF_MAX_SCAN_INTERVAL,
+    CONF_MIN_SCAN_INTERVAL,
+    CONF_PREFIXES,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_NAME,
+    DEFAULT_SCAN_INTERVAL,
+    DOMAIN,
+    MAX_CITIES,
+    REGION_CODES,
+    STATE_CODES,
+)
+from .municipalities import async_get_municipality_index, normalize, starts_with
 
-DATA_SCHEMA = vol.Schema({vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string})
+DATA_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_NAME, default=DEFAULT_NAME): cv.string,
+        # Continua buscando cidades para a mesma entrada (ex.: região metropolitana)
+        vol.Optional("add_another", default=False): cv.boolean,
+    }
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,7 +52,19 @@ _LOGGER = logging.getLogger(__name__)
 class InmetFlowHandler(ConfigFlow, domain=DOMAIN):
     """Handle a InMet config flow."""
 
-    cities = []
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self.cities: list[dict] = []
+        # Cidades escolhidas nas buscas anteriores, por geocódigo
+        self.selected: dict[str, dict] = {}
+        # Estado ou região aguardando confirmação: (nome, prefixo)
+        self.area: tuple[str, str] | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return InmetOptionsFlowHandler()
 
     async def _show_form(
         self,
@@ -48,6 +86,13 @@ class InmetFlowHandler(ConfigFlow, domain=DOMAIN):
             return await self._show_form("user", DATA_SCHEMA)
 
         city_name = user_input.get(CONF_NAME, DEFAULT_NAME)
+        add_another = user_input.get("add_another", False)
+
+        # Uma sigla de estado (ex.: SP) ou o nome de uma região (ex.: Sudeste)
+        # acompanha todos os alertas da área, depois de confirmado
+        if not self.selected and (area := self._find_area(city_name)):
+            self.area = area
+            return await self.async_step_confirm_area()
 
         # Realiza a busca da cidade e limita o número de resultados ao valor de MAX_CITIES
         all_cities = await self._search_city(city_name)
@@ -59,10 +104,18 @@ class InmetFlowHandler(ConfigFlow, domain=DOMAIN):
         # Limitar a lista de cidades ao número definido em MAX_CITIES
         self.cities = all_cities[:MAX_CITIES]
 
-        if len(self.cities) == 1:
-            return await self._create_entry_from_city(self.cities[0])
+        # Só cria a entrada direto se o nome bate exatamente ou pelo início;
+        # resultados aproximados (erros de digitação) passam pela confirmação
+        if len(self.cities) == 1 and starts_with(self.cities[0]["label"], city_name):
+            return await self._add_cities(self.cities, add_another)
 
-        # Se houver múltiplas cidades, pedir ao usuário para escolher uma
+        # Se houver múltiplas cidades, pedir ao usuário para escolher uma ou mais
+        return await self._show_form(
+            "select_city", self._city_selection_schema(add_another)
+        )
+
+    def _city_selection_schema(self, add_another: bool) -> vol.Schema:
+        """Return the schema selecting among the found cities."""
         city_names = {
             city["geocode"]: f"{city['label']} ({city['geocode']})"
             for city in self.cities
@@ -71,58 +124,63 @@ class InmetFlowHandler(ConfigFlow, domain=DOMAIN):
         # Adicionar uma opção extra para voltar, usando o texto de tradução diretamente
         city_names["back"] = "Voltar para digitar outro nome de cidade"
 
-        # Use vol.Optional para exibir como radio buttons
-        city_selection_schema = vol.Schema(
-            {vol.Optional("city_code"): vol.In(city_names)}
+        # Use cv.multi_select para exibir como checkboxes
+        return vol.Schema(
+            {
+                vol.Optional("city_code"): cv.multi_select(city_names),
+                vol.Optional("add_another", default=add_another): cv.boolean,
+            }
         )
 
-        return await self._show_form("select_city", city_selection_schema)
-
     async def async_step_select_city(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Handle city selection step."""
-        city_code = user_input["city_code"]
+        city_codes = user_input.get("city_code") or []
+        add_another = user_input.get("add_another", False)
 
         # Verifique se o usuário escolheu "Voltar"
-        if city_code == "back":
+        if "back" in city_codes:
             return await self.async_step_user()
 
-        # Encontre a cidade com o código selecionado
-        city = next(
-            (city for city in self.cities if city["geocode"] == city_code), None
-        )
+        # Encontre as cidades com os códigos selecionados
+        cities = [city for city in self.cities if city["geocode"] in city_codes]
 
-        if not city:
+        # Sem cidades novas, termina com as escolhidas nas buscas anteriores
+        if not cities and (add_another or not self.selected):
             return await self._show_form(
                 "select_city",
-                vol.Schema(
-                    {
-                        vol.Optional("city_code"): vol.In(
-                            {
-                                c["geocode"]: f"{c['label']} ({c['geocode']})"
-                                for c in self.cities
-                            }
-                        )
-                    }
-                ),
+                self._city_selection_schema(add_another),
                 errors={"base": "city_not_found"},
             )
 
-        # Crie a entrada de configuração a partir da cidade selecionada
-        return await self._create_entry_from_city(city)
+        return await self._add_cities(cities, add_another)
+
+    async def _add_cities(
+        self, cities: list[dict], add_another: bool
+    ) -> ConfigFlowResult:
+        """Keep the chosen cities, then search another one or create the entry."""
+        self.selected.update((city["geocode"], city) for city in cities)
+        if add_another:
+            return await self._show_form("user", DATA_SCHEMA)
+
+        # Crie a entrada de configuração a partir das cidades selecionadas
+        return await self._create_entry_from_cities(list(self.selected.values()))
 
-    async def _create_entry_from_city(self, city: dict) -> ConfigFlowResult:
-        """Create config entry from city data."""
+    async def _create_entry_from_cities(self, cities: list[dict]) -> ConfigFlowResult:
+        """Create config entry from the data of one or more cities."""
+        # A primeira cidade define a localização da entrada
+        city = cities[0]
         user_input = {
             CONF_CODE: city["geocode"],
+            CONF_CODES: [c["geocode"] for c in cities],
             CONF_LATITUDE: city["latitude"],
             CONF_LONGITUDE: city["longitude"],
-            CONF_NAME: city["label"],
+            CONF_NAME: ", ".join(c["label"] for c in cities),
             CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL.total_seconds(),
         }
 
-        identifier = f"inmet_{user_input[CONF_CODE]}"
+        identifier = f"inmet_{'_'.join(sorted(user_input[CONF_CODES]))}"
         title = f"InMet Alert {user_input[CONF_NAME]}"
 
         await self.async_set_unique_id(identifier)
@@ -130,15 +188,110 @@ class InmetFlowHandler(ConfigFlow, domain=DOMAIN):
 
         return self.async_create_entry(title=title, data=user_input)
 
+    @staticmethod
+    def _find_area(name: str) -> tuple[str, str] | None:
+        """Return the name and geocode prefix of a state or region, if named."""
+        state = name.strip().upper()
+        if state in STATE_CODES:
+            return state, STATE_CODES[state]
+        for region, prefix in REGION_CODES.items():
+            if normalize(region) == normalize(name):
+                return region, prefix
+        return None
+
+    async def async_step_confirm_area(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Confirm following every municipality of a state or region."""
+        name, prefix = self.area
+        if user_input is None:
+            return self.async_show_form(
+                step_id="confirm_area",
+                data_schema=vol.Schema({}),
+                description_placeholders={"name": name, "prefix": prefix},
+            )
+        return await self._create_entry_from_area(name, prefix)
+
+    async def _create_entry_from_area(self, name: str, prefix: str) -> ConfigFlowResult:
+        """Create config entry that follows every municipality of an area."""
+        user_input = {
+            CONF_CODE: prefix,
+            CONF_CODES: [],
+            CONF_PREFIXES: [prefix],
+            # Áreas não têm coordenadas próprias, usa a casa como referência
+            CONF_LATITUDE: self.hass.config.latitude,
+            CONF_LONGITUDE: self.hass.config.longitude,
+            CONF_NAME: name,
+            CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL.total_seconds(),
+        }
+
+        kind = "state" if prefix in STATE_CODES.values() else "region"
+        identifier = f"inmet_{kind}_{prefix}"
+        title = f"InMet Alert {name}"
+
+        await self.async_set_unique_id(identifier)
+        self._abort_if_unique_id_configured()
+
+        return self.async_create_entry(title=title, data=user_input)
+
     async def _search_city(self, name: str) -> list | None:
-        """Search the city using the inmet endpoint."""
-        url = f"https://apiprevmet3.inmet.gov.br/autocomplete/{name}"
-        try:
-            async with aiohttp.ClientSession() as session, session.get(url) as response:
-                if response.status != 200:
-                    _LOGGER.error("Failed to search city: %s", name)
-                    return None
-                return await response.json()
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Error fetching city details: %s", err)
-            return None
+        """Search the city, answering repeated searches from the cache."""
+        cache = async_get_search_cache(self.hass)
+        key = normalize(name)
+        if (cities := cache.get(key)) is None:
+            cities = await self._search_city_uncached(name)
+            # Falhas não são guardadas, para que a próxima busca tente de novo
+            if cities is not None:
+                cache.set(key, cities)
+        return cities
+
+    async def _search_city_uncached(self, name: str) -> list | None:
+        """Search the city in the bundled index, then in the inmet endpoint."""
+        index = await async_get_municipality_index(self.hass)
+        if cities := index.search(name, MAX_CITIES):
+            return cities
+
+        return await async_get_api_client(self.hass).search_city(name)
+
+
+class InmetOptionsFlowHandler(OptionsFlow):
+    """Handle the InMet options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the limits of the adaptive scan interval, in minutes."""
+        errors = {}
+        if user_input is not None:
+            # Guardados em segundos, como o intervalo de atualização da entrada
+            min_scan_interval = user_input[CONF_MIN_SCAN_INTERVAL] * 60
+            max_scan_interval = user_input[CONF_MAX_SCAN_INTERVAL] * 60
+            if min_scan_interval <= max_scan_interval:
+                return self.async_create_entry(
+                    data={
+                        CONF_MIN_SCAN_INTERVAL: min_scan_interval,
+                        CONF_MAX_SCAN_INTERVAL: max_scan_interval,
+                    }
+                )
+            errors["base"] = "invalid_scan_interval"
+
+        config = {**self.config_entry.data, **self.config_entry.options}
+        min_scan_interval = config.get(
+            CONF_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL.total_seconds()
+        )
+        max_scan_interval = config.get(
+            CONF_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL.total_seconds()
+        )
+        options_schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_MIN_SCAN_INTERVAL, default=int(min_scan_interval // 60)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                vol.Required(
+                    CONF_MAX_SCAN_INTERVAL, default=int(max_scan_interval // 60)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            }
+        )
+        return self.async_show_form(
+            step_id="init", data_schema=options_schema, errors=errors
+        )
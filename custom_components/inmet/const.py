@@ -10,11 +10,83 @@ PLATFORMS = [Platform.GEO_LOCATION, Platform.SENSOR]
 
 FEED = "feed"
 
+# URL da API, configurável no configuration.yaml para usar um servidor local
+CONF_BASE_URL = "base_url"
+CONF_CODES = "codes"
+CONF_PREFIXES = "prefixes"
+CONF_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_MAX_SCAN_INTERVAL = "max_scan_interval"
+COORDINATOR = "coordinator"
+API_CLIENT = "api_client"
+SEARCH_CACHE = "search_cache"
+PROFILER = "profiler"
+MUNICIPALITIES = "municipalities"
+
 DEFAULT_ICON = "mdi:check"
 ALERT_ICON = "mdi:alert"
 DEFAULT_CODE = "3509502"  # Campinas
 DEFAULT_NAME = "Campinas"  # Campinas
 DEFAULT_SCAN_INTERVAL = timedelta(minutes=30)
+# Intervalo adaptativo: mais rápido com alertas ativos ou próximos, mais lento
+# quando o feed está vazio ou sem mudanças
+DEFAULT_MIN_SCAN_INTERVAL = timedelta(minutes=5)
+DEFAULT_MAX_SCAN_INTERVAL = timedelta(hours=2)
+ALERT_LOOKAHEAD = timedelta(hours=3)
+MAX_BACKOFF_STEPS = 8
+
+# Snapshot of the filtered alerts, restored on startup
+STORAGE_KEY = f"{DOMAIN}.snapshot"
+STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 10
+
+# Serviço que grava um perfil (cProfile) da próxima consulta ao feed
+SERVICE_PROFILE_NEXT_POLL = "profile_next_poll"
+ATTR_POLL_NOW = "poll_now"
+PROFILE_TOP_FUNCTIONS = 20
 
 # Definindo o número máximo de cidades a exibir
 MAX_CITIES = 5
+
+# Cache das buscas de cidades, por consulta normalizada
+SEARCH_CACHE_SIZE = 128
+SEARCH_CACHE_TTL = timedelta(hours=1)
+
+# Códigos IBGE das unidades federativas, prefixo dos geocódigos dos municípios
+STATE_CODES = {
+    "RO": "11",
+    "AC": "12",
+    "AM": "13",
+    "RR": "14",
+    "PA": "15",
+    "AP": "16",
+    "TO": "17",
+    "MA": "21",
+    "PI": "22",
+    "CE": "23",
+    "RN": "24",
+    "PB": "25",
+    "PE": "26",
+    "AL": "27",
+    "SE": "28",
+    "BA": "29",
+    "MG": "31",
+    "ES": "32",
+    "RJ": "33",
+    "SP": "35",
+    "PR": "41",
+    "SC": "42",
+    "RS": "43",
+    "MS": "50",
+    "MT": "51",
+    "GO": "52",
+    "DF": "53",
+}
+
+# Grandes regiões do IBGE, primeiro dígito do código das suas unidades federativas
+REGION_CODES = {
+    "Norte": "1",
+    "Nordeste": "2",
+    "Sudeste": "3",
+    "Sul": "4",
+    "Centro-Oeste": "5",
+}
@@ -0,0 +1,43 @@
+"""JSON decoder backends for the InMet API responses."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Bodies at least this large are decoded in the executor, off the event loop.
+OFF_LOOP_THRESHOLD = 256 * 1024
+
+JSON_BACKENDS: dict[str, Callable[[bytes], Any]] = {"json": json.loads}
+if orjson is not None:
+    JSON_BACKENDS["orjson"] = orjson.loads
+
+# The fastest installed backend.
+DEFAULT_JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def get_json_loads(backend: str | None = None) -> Callable[[bytes], Any]:
+    """Return the loads function of a backend, the default one if None."""
+    try:
+        return JSON_BACKENDS[backend or DEFAULT_JSON_BACKEND]
+    except KeyError:
+        raise ValueError(f"JSON backend not installed: {backend}") from None
+
+
+async def async_decode_json(
+    data: bytes,
+    loads: Callable[[bytes], Any] | None = None,
+    off_loop_threshold: int = OFF_LOOP_THRESHOLD,
+) -> Any:
+    """Decode a JSON body, in the executor if it is large."""
+    loads = loads or get_json_loads()
+    if len(data) < off_loop_threshold:
+        return loads(data)
+    return await asyncio.get_running_loop().run_in_executor(None, loads, data)
@@ -10,7 +10,7 @@ from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE
 from homeassistant.core import HomeAssistant
 
 from . import InMetEntityManager
-from .const import DOMAIN, FEED
+from .const import DOMAIN, FEED, PROFILER, SEARCH_CACHE
 
 TO_REDACT = {CONF_LATITUDE, CONF_LONGITUDE}
 
@@ -29,9 +29,21 @@ async def async_get_config_entry_diagnostics(
         data["service"] = {
             "status": status_info.status,
             "total": status_info.total,
+            "municipalities": status_info.municipalities,
             "last_update": status_info.last_update,
             "last_update_successful": status_info.last_update_successful,
             "last_timestamp": status_info.last_timestamp,
+            "consecutive_failures": status_info.consecutive_failures,
+            "circuit_state": status_info.circuit_state,
+            "circuit_retry": status_info.circuit_retry,
+            "metrics": status_info.metrics,
         }
+    data["polls"] = manager.poll_history.histograms()
+
+    if search_cache := hass.data[DOMAIN].get(SEARCH_CACHE):
+        data["search_cache"] = search_cache.stats()
+
+    if (profiler := hass.data[DOMAIN].get(PROFILER)) and profiler.summary:
+        data["profile"] = profiler.summary
 
     return data
@@ -3,17 +3,109 @@
 from __future__ import annotations
 
 from abc import ABC
-from collections.abc import Awaitable, Callable
-from datetime import datetime
+import asyncio
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Awaitable, Callable, Collection
+from datetime import datetime, timedelta
+import hashlib
+import heapq
+from http import HTTPStatus
+import json
 import logging
+import time
+from zoneinfo import ZoneInfo
 
 import aiohttp
-from aiohttp import ClientSession
-
+from aiohttp import hdrs
+from homeassistant.util import dt as dt_util
+
+from .api import ALERTS_PATH, InMetApiClient
+from .metrics import (
+    METRIC_ALERTS_MATCHED,
+    METRIC_ALERTS_SCANNED,
+    METRIC_CONSECUTIVE_FAILURES,
+    METRIC_DECODE_TIME,
+    METRIC_FAN_OUT_TIME,
+    METRIC_FILTER_TIME,
+    METRIC_HTTP_LATENCY,
+    METRIC_PAYLOAD_BYTES,
+    METRIC_POLL,
+)
+from .retry import CircuitBreaker, RetryPolicy
 from .status_update import StatusUpdate
+from .stream import GeocodeFilter, async_parse_alerts
 
 _LOGGER = logging.getLogger(__name__)
 
+# Returned by the fetch when the server answers 304 to a conditional request.
+NOT_MODIFIED = object()
+
+# Alert start and end times are given in Brasília time.
+ALERT_DATE_FORMAT = "%Y-%m-%d %H:%M"
+ALERT_TIMEZONE = ZoneInfo("America/Sao_Paulo")
+
+# Size of the chunks read by the streaming decoder.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Statuses retried by the fetch, besides every 5xx.
+RETRY_STATUSES = {HTTPStatus.REQUEST_TIMEOUT, HTTPStatus.TOO_MANY_REQUESTS}
+
+# Alert transitions fired by the feed manager timer.
+TRANSITION_START = "start"
+TRANSITION_END = "end"
+
+# Entity callbacks awaited at the same time; 1 restores the serial fan-out.
+DEFAULT_FAN_OUT_CONCURRENCY = 10
+
+# Alert fields rendered by the geolocation entity.
+FINGERPRINT_FIELDS = (
+    "descricao",
+    "severidade",
+    "id_severidade",
+    "riscos",
+    "instrucoes",
+    "aviso_cor",
+    "alterado",
+    "encerrado",
+    "future",
+    "inicio",
+    "fim",
+    "id_sequencia",
+)
+
+
+def parse_alert_time(value: str | None) -> datetime | None:
+    """Parse an alert start or end time into an aware datetime."""
+    try:
+        return datetime.strptime(value, ALERT_DATE_FORMAT).replace(
+            tzinfo=ALERT_TIMEZONE
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def alert_ended(alert: dict, now: datetime) -> bool:
+    """Return True if an alert ended at the given time."""
+    end = parse_alert_time(alert.get("fim"))
+    return end is not None and end <= now
+
+
+def alert_started(alert: dict, now: datetime) -> bool:
+    """Return True if a future alert started at the given time."""
+    start = parse_alert_time(alert.get("inicio"))
+    return bool(alert.get("future")) and start is not None and start <= now
+
+
+def alert_fingerprint(alert: dict) -> str:
+    """Return a stable hash of the alert fields shown by the entity."""
+    content = json.dumps(
+        [alert.get(field) for field in FINGERPRINT_FIELDS],
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha1(content.encode()).hexdigest()
+
 
 class InMetAlert(ABC):
     """InMet Feed class."""
@@ -21,16 +113,21 @@ class InMetAlert(ABC):
     def __init__(self, alert: dict) -> None:
         """Initialize the alert."""
         self._alert = alert
+        self._alerts_by_id: dict[str, dict] = {}
+        for item in alert["alerts"]:
+            self._alerts_by_id.setdefault(item["id"], item)
+
+    def alerts(self) -> list[dict]:
+        """Get all alerts."""
+        return self._alert["alerts"]
 
     def alert_ids(self) -> set | None:
         """Get all alert ids."""
-        alerts = self._alert["alerts"]
+        return set(self._alerts_by_id)
 
-        return {alert["id"] for alert in alerts}
-    
     def status(self) -> str:
         """Get the higher severity"""
-        alerts = self._alert["alerts"]
+        alerts = self._alerts_by_id.values()
 
         if alerts:
             severity = max(alerts, key=lambda alert: alert.get("id_severidade", 0))
@@ -41,10 +138,388 @@ class InMetAlert(ABC):
 
     def get(self, alert_id: str) -> dict | None:
         """Get a specific alert."""
-        return next(
-            (alert for alert in self._alert["alerts"] if alert["id"] == alert_id),
-            None,
+        return self._alerts_by_id.get(alert_id)
+
+    def fingerprint(self, alert_id: str) -> str | None:
+        """Get the content fingerprint of a specific alert."""
+        return self._alert.get("fingerprints", {}).get(alert_id)
+
+    def matches(self, alert_id: str) -> list[str]:
+        """Get the subscribed geocodes matched by a specific alert."""
+        return self._alert.get("matches", {}).get(alert_id, [])
+
+    def municipalities(self) -> dict[str, int]:
+        """Get the number of alerts per subscribed geocode."""
+        return self._alert.get("municipalities", {})
+
+    def advance(self, started: Collection[str], expired: Collection[str]) -> InMetAlert:
+        """Return a copy with some alerts started and others expired.
+
+        Started alerts are copied rather than changed, as the alert dicts are
+        shared with the other managers through the feed index. Fingerprints
+        are computed afresh.
+        """
+        alerts = [
+            {**alert, "future": False} if alert["id"] in started else alert
+            for alert in self.alerts()
+            if alert["id"] not in expired
+        ]
+        matches = {alert["id"]: self.matches(alert["id"]) for alert in alerts}
+        counts = Counter(code for codes in matches.values() for code in codes)
+
+        response = {}
+        response["alerts"] = alerts
+        response["matches"] = matches
+        response["municipalities"] = {
+            code: counts[code] for code in self.municipalities()
+        }
+        response["fingerprints"] = {
+            alert["id"]: alert_fingerprint(alert) for alert in alerts
+        }
+        response["state"] = len(alerts)
+        return InMetAlert(response)
+
+
+class InMetFeedIndex:
+    """Geocode index over a national feed payload.
+
+    Built once per fetch, so matching a city is a dictionary lookup instead of
+    a scan over every alert and its geocodes.
+    """
+
+    def __init__(self, payload: dict) -> None:
+        """Index the alerts of the payload by geocode."""
+        self._alerts: dict[str, dict] = {}
+        self._geocodes: dict[str, list[str]] = {}
+        self._fingerprints: dict[str, str] = {}
+        self._sorted_geocodes: list[str] | None = None
+        self._prefixes: dict[str, list[str]] = {}
+
+        now = datetime.now(ALERT_TIMEZONE)
+        for future, key in ((False, "hoje"), (True, "futuro")):
+            for alert in payload[key]:
+                alert_id = alert["id"]
+                if alert_id in self._alerts:
+                    continue
+                # The feed lists alerts until its next refresh, fix them up the
+                # same way the feed manager timers do in between.
+                if alert_ended(alert, now):
+                    continue
+                is_future = future
+                if future:
+                    start = parse_alert_time(alert.get("inicio"))
+                    is_future = start is None or start > now
+                alert["future"] = is_future
+                self._alerts[alert_id] = alert
+                for geocode in dict.fromkeys(alert["geocodes"].split(",")):
+                    self._geocodes.setdefault(geocode, []).append(alert_id)
+
+    def __len__(self) -> int:
+        """Return the number of indexed alerts."""
+        return len(self._alerts)
+
+    def alerts(self, geocode: str) -> list[dict]:
+        """Get the alerts that cover a geocode."""
+        return [self._alerts[alert_id] for alert_id in self._geocodes.get(geocode, ())]
+
+    def alerts_with_prefix(self, prefix: str) -> list[dict]:
+        """Get the alerts that cover any geocode starting with a prefix.
+
+        IBGE geocodes start with the state code, so "35" selects every alert
+        touching São Paulo. The geocodes are sorted once per payload and each
+        prefix is resolved with a binary search and cached.
+        """
+        alert_ids = self._prefixes.get(prefix)
+        if alert_ids is None:
+            if self._sorted_geocodes is None:
+                self._sorted_geocodes = sorted(self._geocodes)
+            geocodes = self._sorted_geocodes
+            found: dict[str, None] = {}
+            position = bisect_left(geocodes, prefix)
+            while position < len(geocodes) and geocodes[position].startswith(prefix):
+                found.update(dict.fromkeys(self._geocodes[geocodes[position]]))
+                position += 1
+            alert_ids = self._prefixes[prefix] = list(found)
+        return [self._alerts[alert_id] for alert_id in alert_ids]
+
+    def fingerprint(self, alert_id: str) -> str:
+        """Get the fingerprint of an alert, hashing it on first use."""
+        fingerprint = self._fingerprints.get(alert_id)
+        if fingerprint is None:
+            fingerprint = alert_fingerprint(self._alerts[alert_id])
+            self._fingerprints[alert_id] = fingerprint
+        return fingerprint
+
+
+class SingleFlight:
+    """Share one in-flight run of a coroutine function between its callers.
+
+    Callers arriving while a run is pending wait for that run instead of
+    starting another one. A cancelled caller does not cancel the shared run.
+    """
+
+    def __init__(self, function: Callable[[], Awaitable[None]]) -> None:
+        """Initialize with the coroutine function to run."""
+        self._function = function
+        self._task: asyncio.Task | None = None
+
+    async def __call__(self) -> None:
+        """Run the function, or join the pending run."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._function())
+        else:
+            _LOGGER.debug("Joining pending %s", self._function.__qualname__)
+        await asyncio.shield(self._task)
+
+    def cancel(self) -> None:
+        """Cancel the pending run."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class InMetFetchError(Exception):
+    """Failed attempt to fetch the active alerts."""
+
+    def __init__(self, message: str, retryable: bool = True) -> None:
+        """Initialize the error."""
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class InMetFeed:
+    """Shared national InMet feed.
+
+    The active alerts endpoint returns the whole country at once, so it is
+    downloaded a single time per poll and handed to every registered manager.
+    In streaming mode the response is decoded in the executor as it arrives,
+    keeping only the alerts matching a subscription of a registered manager.
+    """
+
+    def __init__(
+        self,
+        api: InMetApiClient,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        streaming: bool = True,
+    ) -> None:
+        """Initialize the shared feed."""
+        self._api = api
+        self._streaming = streaming
+        self._filter: GeocodeFilter | None = None
+        self._metrics: dict[str, float | int | None] = {}
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._managers: list[InMetFeedManager] = []
+        self._index: InMetFeedIndex | None = None
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._update = SingleFlight(self._async_update)
+
+    @property
+    def index(self) -> InMetFeedIndex | None:
+        """Return the index of the latest decoded payload."""
+        return self._index
+
+    @property
+    def metrics(self) -> dict[str, float | int | None]:
+        """Return the metrics of the latest fetch."""
+        return self._metrics
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker:
+        """Return the circuit breaker guarding the fetch."""
+        return self._circuit_breaker
+
+    @property
+    def validators(self) -> dict[str, str | None]:
+        """Return the HTTP validators of the latest full response."""
+        return {"etag": self._etag, "last_modified": self._last_modified}
+
+    def restore_validators(self, etag: str | None, last_modified: str | None) -> None:
+        """Restore the HTTP validators saved by a previous run."""
+        self._etag = etag
+        self._last_modified = last_modified
+
+    def register(self, manager: InMetFeedManager) -> None:
+        """Register a feed manager to receive every new payload."""
+        if manager not in self._managers:
+            self._managers.append(manager)
+        if self._index is not None and not self._covers(manager):
+            # The held payload was filtered without this manager's subscriptions.
+            _LOGGER.debug("Dropping feed index not covering %s", manager)
+            self._index = None
+
+    def _covers(self, manager: InMetFeedManager) -> bool:
+        """Return True if the latest payload was filtered for a manager."""
+        return self._filter is None or self._filter.covers(
+            manager.city_codes, manager.geocode_prefixes
+        )
+
+    def unregister(self, manager: InMetFeedManager) -> None:
+        """Stop handing payloads to a feed manager."""
+        if manager in self._managers:
+            self._managers.remove(manager)
+
+    async def update(self) -> None:
+        """Fetch the national feed and fan it out to the registered managers.
+
+        Overlapping calls share the pending fetch and fan-out.
+        """
+        await self._update()
+
+    async def _async_update(self) -> None:
+        """Fetch the national feed once and fan it out.
+
+        A manager registered while the fetch was in flight may be missing
+        from its filter, the feed is then fetched again for it.
+        """
+        _LOGGER.info("Update national feed")
+
+        missed = True
+        while missed:
+            self._metrics = {}
+            payload = await self._fetch_data()
+            missed = []
+
+            if payload is NOT_MODIFIED:
+                for manager in list(self._managers):
+                    if manager.has_alerts:
+                        await manager.update_not_modified(self._metrics)
+                    elif self._index is not None and self._covers(manager):
+                        await manager.update_from_index(self._index, self._metrics)
+                    else:
+                        missed.append(manager)
+            elif payload:
+                started = time.perf_counter()
+                self._index = InMetFeedIndex(payload)
+                self._metrics[METRIC_FILTER_TIME] = time.perf_counter() - started
+                for manager in list(self._managers):
+                    if self._covers(manager):
+                        await manager.update_from_index(self._index, self._metrics)
+                    else:
+                        missed.append(manager)
+            else:
+                for manager in list(self._managers):
+                    await manager.update_failed(self._metrics)
+
+            if missed:
+                _LOGGER.debug("Fetching the feed again for %s", missed)
+                self._index = None
+
+    async def _fetch_data(self) -> dict | object | None:
+        """Fetch the active alerts from external server.
+
+        Failed attempts are retried with backoff, and a circuit breaker skips
+        the fetch altogether while the server keeps failing.
+        """
+        if not self._circuit_breaker.allow_request():
+            _LOGGER.debug(
+                "Circuit open, not fetching active alerts for %.0fs",
+                self._circuit_breaker.retry_in(),
+            )
+            return None
+
+        headers = {}
+        # Validators are only useful while the payload they describe is held,
+        # either in memory or as snapshots restored by every manager.
+        if self._index is not None or (
+            self._managers and all(manager.has_alerts for manager in self._managers)
+        ):
+            if self._etag:
+                headers[hdrs.IF_NONE_MATCH] = self._etag
+            if self._last_modified:
+                headers[hdrs.IF_MODIFIED_SINCE] = self._last_modified
+
+        policy = self._retry_policy
+        for attempt in range(policy.attempts):
+            if attempt:
+                delay = policy.delay(attempt - 1)
+                _LOGGER.debug("Retrying fetch of active alerts in %.1fs", delay)
+                await asyncio.sleep(delay)
+            try:
+                payload = await self._fetch_once(headers)
+            except InMetFetchError as err:
+                _LOGGER.warning(
+                    "Attempt %s/%s to fetch active alerts failed: %s",
+                    attempt + 1,
+                    policy.attempts,
+                    err,
+                )
+                if not err.retryable:
+                    break
+            else:
+                self._circuit_breaker.record_success()
+                return payload
+
+        self._circuit_breaker.record_failure()
+        _LOGGER.error(
+            "Failed to fetch active alerts, circuit %s after %s failed polls",
+            self._circuit_breaker.state,
+            self._circuit_breaker.failures,
+        )
+        return None
+
+    async def _fetch_once(self, headers: dict[str, str]) -> dict | object:
+        """Send a single request for the active alerts."""
+        timeout = aiohttp.ClientTimeout(total=self._retry_policy.attempt_timeout)
+        started = time.perf_counter()
+        try:
+            async with self._api.get(
+                ALERTS_PATH, headers=headers, timeout=timeout
+            ) as response:
+                self._metrics[METRIC_HTTP_LATENCY] = time.perf_counter() - started
+                if response.status == HTTPStatus.NOT_MODIFIED:
+                    _LOGGER.debug("Active alerts not modified")
+                    return NOT_MODIFIED
+                if response.status != 200:
+                    raise InMetFetchError(
+                        f"HTTP status {response.status}",
+                        response.status >= 500 or response.status in RETRY_STATUSES,
+                    )
+                if self._streaming:
+                    payload = await self._stream_payload(response)
+                else:
+                    self._filter = None
+                    data = await response.read()
+                    started = time.perf_counter()
+                    payload = await self._api.decode(data)
+                    self._metrics[METRIC_PAYLOAD_BYTES] = len(data)
+                    self._metrics[METRIC_DECODE_TIME] = time.perf_counter() - started
+                    self._metrics[METRIC_ALERTS_SCANNED] = sum(
+                        len(payload.get(key, [])) for key in ("hoje", "futuro")
+                    )
+                self._etag = response.headers.get(hdrs.ETAG)
+                self._last_modified = response.headers.get(hdrs.LAST_MODIFIED)
+                return payload
+        except (aiohttp.ClientError, TimeoutError) as err:
+            raise InMetFetchError(repr(err)) from err
+        except ValueError as err:
+            raise InMetFetchError(f"Invalid alerts feed: {err}") from err
+
+    async def _stream_payload(self, response: aiohttp.ClientResponse) -> dict:
+        """Decode the alerts matching the registered managers as they arrive."""
+        geocode_filter = GeocodeFilter(
+            (code for manager in self._managers for code in manager.city_codes),
+            (
+                prefix
+                for manager in self._managers
+                for prefix in manager.geocode_prefixes
+            ),
+        )
+        parser = await async_parse_alerts(
+            response.content.iter_chunked(STREAM_CHUNK_SIZE), geocode_filter
+        )
+        _LOGGER.debug(
+            "Kept %s of %s alerts",
+            sum(len(parser.payload.get(key, [])) for key in ("hoje", "futuro")),
+            parser.scanned,
         )
+        self._filter = geocode_filter
+        self._metrics[METRIC_PAYLOAD_BYTES] = parser.size
+        self._metrics[METRIC_DECODE_TIME] = parser.decode_time
+        self._metrics[METRIC_ALERTS_SCANNED] = parser.scanned
+        return parser.payload
 
 
 class InMetFeedManager:
@@ -52,21 +527,30 @@ class InMetFeedManager:
 
     def __init__(
         self,
-        websession: ClientSession,
-        generate_async_callback: Callable[[str], Awaitable[None]],
+        feed: InMetFeed,
+        generate_async_callback: Callable[[list[str]], Awaitable[None]],
         update_async_callback: Callable[[str], Awaitable[None]],
         remove_async_callback: Callable[[str], Awaitable[None]],
-        city_code: str,
+        city_codes: list[str],
         status_async_callback: Callable[[InMetAlert], Awaitable[None]] | None = None,
+        fan_out_concurrency: int = DEFAULT_FAN_OUT_CONCURRENCY,
+        geocode_prefixes: list[str] | None = None,
     ) -> None:
         """Initialize the InMet Feed Manager."""
         _LOGGER.info("Init InMet FeedManager")
-        self._websession = websession
+        self._feed = feed
         self._managed_alerts_ids: set = set()
-        self._city_code = city_code
+        self._fingerprints: dict[str, str] = {}
+        # Deduplicated, so an alert is counted once per subscribed municipality.
+        self._city_codes: list[str] = list(dict.fromkeys(map(str, city_codes)))
+        # State or region wide subscriptions, matched on the geocode prefix.
+        self._geocode_prefixes: list[str] = list(
+            dict.fromkeys(map(str, geocode_prefixes or []))
+        )
         self._last_update: datetime | None = None
+        self._last_update_successful: datetime | None = None
         self._alerts: InMetAlert | None = None
-        self._generate_async_callback: Callable[[str], Awaitable[None]] = (
+        self._generate_async_callback: Callable[[list[str]], Awaitable[None]] = (
             generate_async_callback
         )
         self._update_async_callback: Callable[[str], Awaitable[None]] = (
@@ -78,78 +562,280 @@ class InMetFeedManager:
         self._status_async_callback: Callable[[InMetAlert], Awaitable[None]] = (
             status_async_callback
         )
+        self._fan_out_concurrency = max(1, fan_out_concurrency)
+        self._transitions: list[tuple[datetime, int, str, str]] = []
+        self._transition_timer: asyncio.TimerHandle | None = None
+        self._transition_task: asyncio.Task | None = None
+        self._update = SingleFlight(self._async_update)
+        self._update_lock = asyncio.Lock()
+        self._poll = 0
+        self._metrics: dict[str, float | int | None] = {}
+
+    @property
+    def city_codes(self) -> list[str]:
+        """Return the subscribed municipality geocodes."""
+        return self._city_codes
+
+    @property
+    def geocode_prefixes(self) -> list[str]:
+        """Return the subscribed geocode prefixes."""
+        return self._geocode_prefixes
 
     async def update(self):
-        """Update the feed and then update connected entities."""
+        """Update the feed and then update connected entities.
+
+        Overlapping calls share the pending update.
+        """
+        await self._update()
+
+    async def _async_update(self) -> None:
+        """Update the feed once and then update connected entities."""
         _LOGGER.info("Update")
 
-        payload = await self._fetch_data()
+        if self._feed.index is None:
+            # Registered managers receive the payload from the shared feed.
+            await self._feed.update()
+        else:
+            await self.update_from_index(self._feed.index)
 
-        if payload:
-            self._alerts = self._filter_payload(payload)
-            self._last_update = datetime.now()
+    async def update_from_index(
+        self, index: InMetFeedIndex, fetch_metrics: dict | None = None
+    ) -> None:
+        """Update connected entities from an indexed payload."""
+        self._last_update = self._last_update_successful = dt_util.utcnow()
+        metrics = self._start_poll(fetch_metrics)
+        started = time.perf_counter()
+        alerts = self._filter_payload(index)
+        metrics[METRIC_FILTER_TIME] = (
+            metrics.get(METRIC_FILTER_TIME, 0) + time.perf_counter() - started
+        )
+        metrics[METRIC_ALERTS_MATCHED] = len(alerts.alert_ids())
+        await self._update_alerts(alerts, metrics)
+
+    def load_snapshot(self, alerts: list[dict]) -> None:
+        """Hold a snapshot of filtered alerts until the feed is filtered."""
+        if self._alerts is not None:
+            return
+        payload = {
+            "hoje": [alert for alert in alerts if not alert["future"]],
+            "futuro": [alert for alert in alerts if alert["future"]],
+        }
+        self._alerts = self._filter_payload(InMetFeedIndex(payload))
+
+    async def restore(self) -> None:
+        """Rebuild connected entities from the held alerts.
+
+        These are the snapshot alerts, or the fresh ones if an update got the
+        lock first, in which case the pass changes nothing.
+        """
+        async with self._update_lock:
+            if self._alerts is not None:
+                await self._diff_alerts(self._alerts)
+
+    def snapshot(self) -> list[dict] | None:
+        """Return the filtered alerts for persistence.
+
+        The national geocode list of each alert is narrowed down to the
+        subscribed municipalities it matched.
+        """
+        if self._alerts is None:
+            return None
+        return [
+            {**alert, "geocodes": ",".join(self._alerts.matches(alert["id"]))}
+            for alert in self._alerts.alerts()
+        ]
+
+    def alerts(self) -> list[dict]:
+        """Return the filtered alerts."""
+        return self._alerts.alerts() if self._alerts is not None else []
+
+    @property
+    def has_alerts(self) -> bool:
+        """Return True once alerts were filtered or restored."""
+        return self._alerts is not None
+
+    def _start_poll(self, fetch_metrics: dict | None) -> dict:
+        """Start the metrics of a poll from those of its fetch, if any."""
+        self._poll += 1
+        self._metrics = {
+            METRIC_POLL: self._poll,
+            **(fetch_metrics or {}),
+            METRIC_CONSECUTIVE_FAILURES: self._feed.circuit_breaker.failures,
+        }
+        return self._metrics
+
+    @property
+    def metrics(self) -> dict[str, float | int | None]:
+        """Return the metrics of the latest poll."""
+        return self._metrics
+
+    async def _update_alerts(
+        self, alerts: InMetAlert, metrics: dict | None = None
+    ) -> None:
+        """Diff the filtered alerts against the managed entities.
+
+        Passes are serialized, so each one diffs against the entities the
+        previous pass left behind.
+        """
+        async with self._update_lock:
+            await self._diff_alerts(alerts, metrics)
 
-            count_created: int = 0
-            count_updated: int = 0
-            count_removed: int = 0
+    async def _diff_alerts(
+        self, alerts: InMetAlert, metrics: dict | None = None
+    ) -> None:
+        """Send the signals taking the managed entities to the given alerts."""
+        self._alerts = alerts
+        started = time.perf_counter()
 
-            alert_ids = self._alerts.alert_ids()
-            status = self._alerts.status()
+        count_created: int = 0
+        count_updated: int = 0
+        count_removed: int = 0
 
-            total = len(alert_ids)
+        alert_ids = self._alerts.alert_ids()
+        status = self._alerts.status()
 
-            count_removed = await self._update_feed_remove_entries(alert_ids)
-            count_updated = await self._update_feed_update_entries(alert_ids)
-            count_created = await self._update_feed_create_entries(alert_ids)
+        total = len(alert_ids)
 
+        count_removed = await self._update_feed_remove_entries(alert_ids)
+        count_updated = await self._update_feed_update_entries(alert_ids)
+        count_created = await self._update_feed_create_entries(alert_ids)
+        if metrics is not None:
+            metrics[METRIC_FAN_OUT_TIME] = time.perf_counter() - started
+
+        await self._status_update(
+            status, total, count_created, count_updated, count_removed
+        )
+
+        self._schedule_transitions()
+
+    def stop(self) -> None:
+        """Cancel the pending update and alert transition timer."""
+        self._update.cancel()
+        if self._transition_timer:
+            self._transition_timer.cancel()
+            self._transition_timer = None
+        if self._transition_task:
+            self._transition_task.cancel()
+            self._transition_task = None
+        self._transitions = []
+
+    def _schedule_transitions(self) -> None:
+        """Arm a timer for the next start or end of the filtered alerts.
+
+        Transitions are kept in a heap, and a single timer is armed for the
+        earliest one, so alerts start and expire on time without polling.
+        """
+        if self._transition_timer:
+            self._transition_timer.cancel()
+            self._transition_timer = None
+
+        now = datetime.now(ALERT_TIMEZONE)
+        self._transitions = []
+        for sequence, alert in enumerate(self.alerts()):
+            start = parse_alert_time(alert.get("inicio"))
+            if alert.get("future") and start is not None and start > now:
+                self._transitions.append(
+                    (start, sequence, TRANSITION_START, alert["id"])
+                )
+            end = parse_alert_time(alert.get("fim"))
+            if end is not None:
+                self._transitions.append((end, sequence, TRANSITION_END, alert["id"]))
+        heapq.heapify(self._transitions)
+
+        if self._transitions:
+            delay = (self._transitions[0][0] - now).total_seconds()
+            self._transition_timer = asyncio.get_running_loop().call_later(
+                max(delay, 0), self._transition_due
+            )
+
+    def _transition_due(self) -> None:
+        """Handle the timer of the next alert transition."""
+        self._transition_timer = None
+        self._transition_task = asyncio.get_running_loop().create_task(
+            self._process_transitions()
+        )
+
+    async def _process_transitions(self) -> None:
+        """Start and expire the alerts whose time has come."""
+        now = datetime.now(ALERT_TIMEZONE)
+        started: set[str] = set()
+        expired: set[str] = set()
+        while self._transitions and self._transitions[0][0] <= now:
+            _, _, transition, alert_id = heapq.heappop(self._transitions)
+            if self._alerts.get(alert_id) is None:
+                continue
+            if transition == TRANSITION_START:
+                _LOGGER.debug("Alert started %s", alert_id)
+                started.add(alert_id)
+            else:
+                _LOGGER.debug("Alert expired %s", alert_id)
+                expired.add(alert_id)
+
+        self._transition_task = None
+        async with self._update_lock:
+            await self._diff_alerts(self._alerts.advance(started, expired))
+
+    async def update_not_modified(self, fetch_metrics: dict | None = None) -> None:
+        """Record a successful poll of a feed that did not change."""
+        self._last_update = self._last_update_successful = dt_util.utcnow()
+        metrics = self._start_poll(fetch_metrics)
+        if self._alerts is not None:
+            metrics[METRIC_ALERTS_MATCHED] = len(self._alerts.alert_ids())
             await self._status_update(
-                status, total, count_created, count_updated, count_removed
+                self._alerts.status(), len(self._alerts.alert_ids()), 0, 0, 0
             )
 
+    async def update_failed(self, fetch_metrics: dict | None = None) -> None:
+        """Record a poll that could not fetch the feed."""
+        self._last_update = dt_util.utcnow()
+        self._start_poll(fetch_metrics)
+        status = self._alerts.status() if self._alerts is not None else None
+        total = len(self._alerts.alert_ids()) if self._alerts is not None else 0
+        await self._status_update(status, total, 0, 0, 0)
+
     def get(self, alert_id: str) -> dict | None:
         """Get an entry."""
         _LOGGER.info("Getting alert id: %s", alert_id)
 
         return self._alerts.get(alert_id)
 
-    async def _fetch_data(self) -> dict | None:
-        """Fetch city details from external server."""
-        url = "https://apiprevmet3.inmet.gov.br/avisos/ativos"
-        try:
-            async with self._websession.get(url) as response:
-                if response.status != 200:
-                    _LOGGER.error(
-                        "Failed to fetch details for city code: %s", self._city_code
-                    )
-                    return None
-                return await response.json()
-        except aiohttp.ClientError as err:
-            _LOGGER.error("Error fetching city details: %s", err)
-            return None
+    def _filter_payload(self, index: InMetFeedIndex) -> InMetAlert:
+        """Filter the subscribed city codes and prefixes, keeping each alert once.
+
+        A held index may be older than the latest transitions, so alerts are
+        checked against the current time: ended ones are left out and started
+        ones are copied as current.
+        """
+        now = datetime.now(ALERT_TIMEZONE)
+        alerts: dict[str, dict] = {}
+        matches: dict[str, list[str]] = {}
+        municipalities: dict[str, int] = {}
+        subscriptions = [
+            *((city_code, index.alerts) for city_code in self._city_codes),
+            *((prefix, index.alerts_with_prefix) for prefix in self._geocode_prefixes),
+        ]
+        for code, lookup in subscriptions:
+            code_alerts = [
+                alert for alert in lookup(code) if not alert_ended(alert, now)
+            ]
+            municipalities[code] = len(code_alerts)
+            for alert in code_alerts:
+                alerts.setdefault(alert["id"], alert)
+                matches.setdefault(alert["id"], []).append(code)
+
+        fingerprints: dict[str, str] = {}
+        for alert_id, alert in alerts.items():
+            if alert_started(alert, now):
+                alert = alerts[alert_id] = {**alert, "future": False}
+                fingerprints[alert_id] = alert_fingerprint(alert)
+            else:
+                fingerprints[alert_id] = index.fingerprint(alert_id)
 
-    def _filter_payload(self, payload: dict) -> InMetAlert:
-        """Filter the city_code."""
         response = {}
-        response["state"] = 0
-        response["alerts"] = []
-
-        today = payload["hoje"]
-        city_code: str = str(self._city_code)
-        for alert in today:
-            geocodes = alert["geocodes"].split(",")
-
-            if city_code in geocodes:
-                alert["future"] = False
-                response["alerts"].append(alert)
-
-        futuro = payload["futuro"]
-        for alert in futuro:
-            geocodes = alert["geocodes"].split(",")
-
-            if city_code in geocodes:
-                alert["future"] = True
-                response["alerts"].append(alert)
-
+        response["alerts"] = list(alerts.values())
+        response["matches"] = matches
+        response["municipalities"] = municipalities
+        response["fingerprints"] = fingerprints
         response["state"] = len(response["alerts"])
         return InMetAlert(response)
 
@@ -161,8 +847,12 @@ class InMetFeedManager:
         return count_removed
 
     async def _update_feed_update_entries(self, alert_ids: set[str]) -> int:
-        """Update entities after feed update."""
-        update_external_ids: set[str] = self._managed_alerts_ids.intersection(alert_ids)
+        """Update entities whose content changed after feed update."""
+        update_external_ids: set[str] = {
+            alert_id
+            for alert_id in self._managed_alerts_ids.intersection(alert_ids)
+            if self._fingerprints.get(alert_id) != self._alerts.fingerprint(alert_id)
+        }
         count_updated = len(update_external_ids)
         await self._update_entities(update_external_ids)
         return count_updated
@@ -175,38 +865,89 @@ class InMetFeedManager:
         return count_created
 
     async def _generate_new_entities(self, alert_ids: set[str]):
-        """Generate new entities for events."""
+        """Generate new entities for events, all in a single batch."""
+        if not alert_ids:
+            return
+        try:
+            await self._generate_async_callback(sorted(alert_ids))
+        except Exception:
+            # Left unmanaged, so the next update retries the creation.
+            _LOGGER.exception("Failed to add entities %s", alert_ids)
+            return
+        _LOGGER.debug("New entities added %s", alert_ids)
+        self._managed_alerts_ids.update(alert_ids)
         for alert_id in alert_ids:
-            await self._generate_async_callback(alert_id)
-            _LOGGER.debug("New entity added %s", alert_id)
-            self._managed_alerts_ids.add(alert_id)
+            self._fingerprints[alert_id] = self._alerts.fingerprint(alert_id)
 
     async def _update_entities(self, alert_ids: set[str]):
         """Update entities."""
-        for alert_id in alert_ids:
-            _LOGGER.debug("Existing entity found %s", alert_id)
-            await self._update_async_callback(alert_id)
+        _LOGGER.debug("Existing entities changed %s", alert_ids)
+        failed = await self._fan_out(self._update_async_callback, alert_ids)
+        # Failed updates keep their old fingerprint and are retried next update.
+        for alert_id in alert_ids - failed:
+            self._fingerprints[alert_id] = self._alerts.fingerprint(alert_id)
 
     async def _remove_entities(self, alert_ids: set[str]):
         """Remove entities."""
         for alert_id in alert_ids:
             _LOGGER.debug("Entity not current anymore %s", alert_id)
             self._managed_alerts_ids.remove(alert_id)
-            await self._remove_async_callback(alert_id)
+            self._fingerprints.pop(alert_id, None)
+        await self._fan_out(self._remove_async_callback, alert_ids)
+
+    async def _fan_out(
+        self,
+        async_callback: Callable[[str], Awaitable[None]],
+        alert_ids: Collection[str],
+    ) -> set[str]:
+        """Run a callback for every alert, at most fan_out_concurrency at a time.
+
+        Errors are gathered per alert so one failing callback does not stall
+        the others. Return the ids whose callback failed.
+        """
+        semaphore = asyncio.Semaphore(self._fan_out_concurrency)
+
+        async def run(alert_id: str) -> None:
+            async with semaphore:
+                await async_callback(alert_id)
+
+        alert_ids = list(alert_ids)
+        results = await asyncio.gather(
+            *(run(alert_id) for alert_id in alert_ids), return_exceptions=True
+        )
+        failed: set[str] = set()
+        for alert_id, result in zip(alert_ids, results):
+            if isinstance(result, Exception):
+                _LOGGER.error("Callback failed for alert %s: %s", alert_id, result)
+                failed.add(alert_id)
+        return failed
 
     async def _status_update(
-        self, status: str, total: int, count_created: int, count_updated: int, count_removed: int
+        self, status: str | None, total: int, count_created: int, count_updated: int, count_removed: int
     ):
         """Provide status update."""
         if self._status_async_callback:
+            circuit_breaker = self._feed.circuit_breaker
+            retry_in = circuit_breaker.retry_in()
+            # The newest alert is the one starting last.
+            starts = [parse_alert_time(alert.get("inicio")) for alert in self.alerts()]
             s = StatusUpdate(
                 status,
-                None,
-                None,
-                None,
+                self._last_update,
+                self._last_update_successful,
+                max(filter(None, starts), default=None),
                 total,
                 count_created,
-                count_removed,
                 count_updated,
+                count_removed,
+                self._alerts.municipalities() if self._alerts is not None else {},
+                consecutive_failures=circuit_breaker.failures,
+                circuit_state=circuit_breaker.state,
+                circuit_retry=(
+                    dt_util.utcnow() + timedelta(seconds=retry_in)
+                    if retry_in is not None
+                    else None
+                ),
+                metrics=self._metrics,
             )
             await self._status_async_callback(s)
@@ -60,17 +60,20 @@ async def async_setup_entry(
     manager: InMetEntityManager = hass.data[DOMAIN][FEED][entry.entry_id]
 
     @callback
-    def async_add_geolocation(
-        feed_manager: InMetEntityManager, integration_id: str, external_id: str
+    def async_add_geolocations(
+        feed_manager: InMetEntityManager, integration_id: str, external_ids: list[str]
     ) -> None:
-        """Add geolocation entity from feed."""
-        new_entity = InmetEvent(feed_manager, integration_id, external_id)
-        _LOGGER.debug("Adding geolocation %s", new_entity)
-        async_add_entities([new_entity], True)
+        """Add the geolocation entities of a feed update in one batch."""
+        new_entities = [
+            InmetEvent(feed_manager, integration_id, external_id)
+            for external_id in external_ids
+        ]
+        _LOGGER.debug("Adding geolocations %s", new_entities)
+        async_add_entities(new_entities, True)
 
     manager.listeners.append(
         async_dispatcher_connect(
-            hass, manager.async_event_new_entity(), async_add_geolocation
+            hass, manager.async_event_new_entity(), async_add_geolocations
         )
     )
     # Do not wait for update here so that the setup can be completed and because an
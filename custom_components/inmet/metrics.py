@@ -0,0 +1,81 @@
+"""Per poll metrics of the InMet feed."""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+import statistics
+
+METRIC_POLL = "poll"
+METRIC_HTTP_LATENCY = "http_latency"
+METRIC_PAYLOAD_BYTES = "payload_bytes"
+METRIC_DECODE_TIME = "decode_time"
+METRIC_FILTER_TIME = "filter_time"
+METRIC_FAN_OUT_TIME = "fan_out_time"
+METRIC_ALERTS_SCANNED = "alerts_scanned"
+METRIC_ALERTS_MATCHED = "alerts_matched"
+METRIC_CONSECUTIVE_FAILURES = "consecutive_failures"
+
+# Upper bounds of the histogram buckets, the last bucket is unbounded.
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 16 * 1024, 128 * 1024, 1024**2, 8 * 1024**2, 64 * 1024**2)
+COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000)
+
+HISTOGRAMS = {
+    METRIC_HTTP_LATENCY: TIME_BUCKETS,
+    METRIC_PAYLOAD_BYTES: SIZE_BUCKETS,
+    METRIC_DECODE_TIME: TIME_BUCKETS,
+    METRIC_FILTER_TIME: TIME_BUCKETS,
+    METRIC_FAN_OUT_TIME: TIME_BUCKETS,
+    METRIC_ALERTS_SCANNED: COUNT_BUCKETS,
+    METRIC_ALERTS_MATCHED: COUNT_BUCKETS,
+    METRIC_CONSECUTIVE_FAILURES: COUNT_BUCKETS,
+}
+
+# Number of polls kept for the histograms.
+POLL_HISTORY_SIZE = 288
+
+
+class PollHistory:
+    """Rolling window of the metrics of the latest polls."""
+
+    def __init__(self, maxlen: int = POLL_HISTORY_SIZE) -> None:
+        """Initialize the history."""
+        self._polls: deque[dict] = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        """Return the number of polls kept."""
+        return len(self._polls)
+
+    def add(self, metrics: dict) -> None:
+        """Add the metrics of a poll, once."""
+        if not metrics or (
+            self._polls and self._polls[-1].get(METRIC_POLL) == metrics.get(METRIC_POLL)
+        ):
+            return
+        self._polls.append(metrics)
+
+    def histograms(self) -> dict[str, dict]:
+        """Return a histogram and a summary of every metric."""
+        result = {}
+        for metric, buckets in HISTOGRAMS.items():
+            values = sorted(
+                value for poll in self._polls if (value := poll.get(metric)) is not None
+            )
+            if not values:
+                continue
+            counts = [0] * (len(buckets) + 1)
+            for value in values:
+                counts[bisect_left(buckets, value)] += 1
+            result[metric] = {
+                "count": len(values),
+                "min": values[0],
+                "median": statistics.median(values),
+                "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max": values[-1],
+                "buckets": {
+                    f"le_{bound}": count
+                    for bound, count in zip((*buckets, "inf"), counts)
+                },
+            }
+        return result
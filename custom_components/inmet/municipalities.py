@@ -0,0 +1,166 @@
+"""Offline IBGE municipality index for the InMet city search."""
+
+from __future__ import annotations
+
+from collections import Counter
+import json
+import logging
+from pathlib import Path
+import unicodedata
+
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, MUNICIPALITIES
+
+_LOGGER = logging.getLogger(__name__)
+
+# Generated by script/build_municipalities.py
+DATA_FILE = Path(__file__).parent / "municipalities.json"
+
+
+# Fuzzy matches below this trigram similarity are not shown.
+MIN_SIMILARITY = 0.3
+
+# Tier of the names only similar to the query, ranked by similarity first.
+FUZZY_TIER = 4
+
+
+def normalize(name: str) -> str:
+    """Normalize a municipality name for matching.
+
+    Accents and punctuation are folded, so "Sao Jose" matches "São José" and
+    "Estrela d'Oeste" matches "estrela d oeste".
+    """
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    folded = "".join(
+        char if char.isalnum() else " "
+        for char in decomposed
+        if not unicodedata.combining(char)
+    )
+    return " ".join(folded.split())
+
+
+def starts_with(label: str, name: str) -> bool:
+    """Return True if a city label starts with a searched name, once normalized."""
+    query = normalize(name)
+    return bool(query) and normalize(label).startswith(query)
+
+
+def trigrams(name: str) -> set[str]:
+    """Return the trigrams of a normalized name, padded to weigh word starts."""
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class MunicipalityIndex:
+    """In-memory trigram index over the IBGE municipalities."""
+
+    def __init__(self, municipalities: list[list]) -> None:
+        """Index rows of [geocode, name, state, latitude, longitude, population]."""
+        self._cities: list[dict] = []
+        self._names: list[str] = []
+        self._populations: list[int] = []
+        self._name_trigrams: list[int] = []
+        self._trigrams: dict[str, list[int]] = {}
+
+        for position, row in enumerate(municipalities):
+            geocode, name, state, latitude, longitude, population = row
+            self._cities.append(
+                {
+                    "geocode": str(geocode),
+                    "label": f"{name} - {state}",
+                    "latitude": latitude,
+                    "longitude": longitude,
+                }
+            )
+            normalized = normalize(name)
+            name_trigrams = trigrams(normalized)
+            self._names.append(normalized)
+            self._populations.append(population)
+            self._name_trigrams.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                self._trigrams.setdefault(trigram, []).append(position)
+
+    def __len__(self) -> int:
+        """Return the number of indexed municipalities."""
+        return len(self._cities)
+
+    def search(self, name: str, limit: int) -> list[dict]:
+        """Return the municipalities that best match a name, best first.
+
+        Exact names rank first, then names starting with the query, names
+        whose words start with the query words, names containing the query
+        and finally names similar enough to absorb typos. Within a tier the
+        most populous municipalities rank first, so "Sao Jose" lists São José
+        dos Campos before São José da Lapa, except typos, which rank by
+        trigram similarity first.
+        """
+        query = normalize(name)
+        if not query:
+            return []
+
+        query_trigrams = trigrams(query)
+        shared: Counter[int] = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+
+        # Every tier shares at least half of the query trigrams with the name.
+        min_shared = len(query_trigrams) // 2
+        query_words = query.split()
+        ranked: list[tuple[int, float, float, str, int]] = []
+        for city, count in shared.items():
+            if count < min_shared:
+                continue
+            city_name = self._names[city]
+            similarity = 2 * count / (len(query_trigrams) + self._name_trigrams[city])
+            if city_name == query:
+                tier = 0
+            elif city_name.startswith(query):
+                tier = 1
+            elif self._words_match(query_words, city_name.split()):
+                tier = 2
+            elif query in city_name:
+                tier = 3
+            elif similarity >= MIN_SIMILARITY:
+                tier = FUZZY_TIER
+            else:
+                continue
+            population = self._populations[city]
+            if tier == FUZZY_TIER:
+                ranked.append((tier, -similarity, -population, city_name, city))
+            else:
+                ranked.append((tier, -population, -similarity, city_name, city))
+
+        ranked.sort()
+        return [dict(self._cities[city]) for *_, city in ranked[:limit]]
+
+    @staticmethod
+    def _words_match(query_words: list[str], name_words: list[str]) -> bool:
+        """Return True if the query words start the name words, in order."""
+        words = iter(name_words)
+        return all(
+            any(word.startswith(query_word) for word in words)
+            for query_word in query_words
+        )
+
+
+def load_municipality_index(path: Path = DATA_FILE) -> MunicipalityIndex:
+    """Load the bundled municipality dataset, this does blocking I/O."""
+    try:
+        with path.open(encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        _LOGGER.warning("Municipality dataset not found: %s", path)
+        return MunicipalityIndex([])
+    return MunicipalityIndex(data["municipalities"])
+
+
+async def async_get_municipality_index(hass: HomeAssistant) -> MunicipalityIndex:
+    """Return the municipality index, loading it the first time it's needed."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if MUNICIPALITIES not in data:
+        index = await hass.async_add_executor_job(load_municipality_index)
+        # Another flow may have loaded it while this one waited.
+        data.setdefault(MUNICIPALITIES, index)
+        _LOGGER.debug("Loaded %s municipalities", len(data[MUNICIPALITIES]))
+    return data[MUNICIPALITIES]
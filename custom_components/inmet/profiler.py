@@ -0,0 +1,97 @@
+"""Profile a poll of the InMet feed on demand."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import cProfile
+import logging
+import pstats
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, PROFILE_TOP_FUNCTIONS, PROFILER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollProfiler:
+    """Run cProfile around the next poll once it is requested.
+
+    Everything running on the event loop during the poll is profiled, so the
+    result shows what kept the loop busy, not only the InMet code.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the profiler."""
+        self._hass = hass
+        self._requested = False
+        self.summary: dict[str, Any] | None = None
+
+    @callback
+    def async_request(self) -> None:
+        """Profile the next poll."""
+        self._requested = True
+
+    @asynccontextmanager
+    async def async_profile(self) -> AsyncIterator[None]:
+        """Profile the wrapped poll, if requested."""
+        if not self._requested:
+            yield
+            return
+
+        self._requested = False
+        profile = cProfile.Profile()
+        started = dt_util.utcnow()
+        try:
+            profile.enable()
+        except ValueError as err:
+            # Another profiler, such as the profiler integration, is running.
+            _LOGGER.warning("Unable to profile the poll: %s", err)
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            path = self._hass.config.path(
+                f"{DOMAIN}_poll_{started.strftime('%Y%m%d%H%M%S')}.prof"
+            )
+            self.summary = await self._hass.async_add_executor_job(
+                self._save, profile, path
+            )
+            self.summary["started"] = started.isoformat()
+            _LOGGER.info("Poll profile written to %s", path)
+
+    @staticmethod
+    def _save(profile: cProfile.Profile, path: str) -> dict[str, Any]:
+        """Write the profile and summarize its hot functions."""
+        profile.dump_stats(path)
+        stats = pstats.Stats(profile)
+        # Hottest first, by the time spent in the function itself.
+        hot = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        top = hot[:PROFILE_TOP_FUNCTIONS]
+        return {
+            "path": path,
+            "total_time": stats.total_tt,
+            "functions": [
+                {
+                    "function": pstats.func_std_string(function),
+                    "calls": calls,
+                    "self_time": self_time,
+                    "cumulative_time": cumulative_time,
+                }
+                for function, (_, calls, self_time, cumulative_time, _) in top
+            ],
+        }
+
+
+@callback
+def async_get_profiler(hass: HomeAssistant) -> PollProfiler:
+    """Return the poll profiler shared by all config entries."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if PROFILER not in data:
+        data[PROFILER] = PollProfiler(hass)
+    return data[PROFILER]
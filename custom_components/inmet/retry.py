@@ -0,0 +1,93 @@
+"""Retry policy and circuit breaker for the InMet API."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+import random
+import time
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter."""
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 2.0,
+        max_delay: float = 30.0,
+        attempt_timeout: float = 20.0,
+        jitter: Callable[[], float] = random.random,
+    ) -> None:
+        """Initialize the policy, delays and timeouts are in seconds."""
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self._jitter = jitter
+
+    def delay(self, retry: int) -> float:
+        """Return how long to wait before a retry, counted from 0."""
+        return self._jitter() * min(self.max_delay, self.base_delay * 2**retry)
+
+
+class CircuitBreaker:
+    """Stop calling a failing service for a while.
+
+    The circuit opens after a number of consecutive failed polls. Once the
+    reset timeout elapses a single trial poll is let through (half open): a
+    success closes the circuit, a failure opens it again for twice as long.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 300.0,
+        max_reset_timeout: float = 3600.0,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the breaker, timeouts are in seconds."""
+        self._failure_threshold = failure_threshold
+        self._base_reset_timeout = reset_timeout
+        self._max_reset_timeout = max_reset_timeout
+        self._timer = timer
+        self._reset_timeout = reset_timeout
+        self._opened_until: float | None = None
+        self.failures = 0
+
+    @property
+    def state(self) -> str:
+        """Return the circuit state."""
+        if self._opened_until is None:
+            return CIRCUIT_CLOSED
+        if self._timer() < self._opened_until:
+            return CIRCUIT_OPEN
+        return CIRCUIT_HALF_OPEN
+
+    def retry_in(self) -> float | None:
+        """Return the seconds until an open circuit lets a poll through."""
+        if self.state != CIRCUIT_OPEN:
+            return None
+        return self._opened_until - self._timer()
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent."""
+        return self.state != CIRCUIT_OPEN
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self._reset_timeout = self._base_reset_timeout
+        self._opened_until = None
+
+    def record_failure(self) -> None:
+        """Count a failed poll, opening the circuit past the threshold."""
+        self.failures += 1
+        if self.state == CIRCUIT_HALF_OPEN:
+            self._reset_timeout = min(self._reset_timeout * 2, self._max_reset_timeout)
+        elif self.failures < self._failure_threshold:
+            return
+        self._opened_until = self._timer() + self._reset_timeout
@@ -7,15 +7,22 @@ from datetime import datetime
 import logging
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
 
 from . import InMetEntityManager
 from .const import ALERT_ICON, DEFAULT_ICON, DOMAIN, FEED
+from .metrics import METRIC_HTTP_LATENCY, METRIC_POLL
 from .status_update import StatusUpdate
 
 _LOGGER = logging.getLogger(__name__)
@@ -27,6 +34,10 @@ ATTR_LAST_TIMESTAMP = "last_timestamp"
 ATTR_CREATED = "created"
 ATTR_UPDATED = "updated"
 ATTR_REMOVED = "removed"
+ATTR_MUNICIPALITIES = "municipalities"
+ATTR_CONSECUTIVE_FAILURES = "consecutive_failures"
+ATTR_CIRCUIT_STATE = "circuit_state"
+ATTR_CIRCUIT_RETRY = "circuit_retry"
 
 DEFAULT_UNIT_OF_MEASUREMENT = "alerts"
 
@@ -40,7 +51,7 @@ async def async_setup_entry(
     """Set up the InMet platform."""
     manager: InMetEntityManager = hass.data[DOMAIN][FEED][entry.entry_id]
     sensor = InMetSensor(entry, manager)
-    async_add_entities([sensor])
+    async_add_entities([sensor, InMetPollSensor(entry, manager)])
 
 
 class InMetSensor(SensorEntity):
@@ -66,6 +77,10 @@ class InMetSensor(SensorEntity):
         self._created: int | None = None
         self._updated: int | None = None
         self._removed: int | None = None
+        self._municipalities: dict[str, int] | None = None
+        self._consecutive_failures: int | None = None
+        self._circuit_state: str | None = None
+        self._circuit_retry: datetime | None = None
         self._remove_signal_status: Callable[[], None] | None = None
         self._attr_attribution = "Data provided by InMet"
         self._attr_device_info = DeviceInfo(
@@ -107,20 +122,24 @@ class InMetSensor(SensorEntity):
     def _update_from_status_info(self, status_info: StatusUpdate) -> None:
         """Update the internal state from the provided information."""
         self._status = status_info.status
-        # self._last_update = (
-        #     dt_util.as_utc(status_info.last_update) if status_info.last_update else None
-        # )
-        # if status_info.last_update_successful:
-        #     self._last_update_successful = dt_util.as_utc(
-        #         status_info.last_update_successful
-        #     )
-        # else:
-        #     self._last_update_successful = None
-        # self._last_timestamp = status_info.last_timestamp
+        self._last_update = (
+            dt_util.as_utc(status_info.last_update) if status_info.last_update else None
+        )
+        if status_info.last_update_successful:
+            self._last_update_successful = dt_util.as_utc(
+                status_info.last_update_successful
+            )
+        else:
+            self._last_update_successful = None
+        self._last_timestamp = status_info.last_timestamp
         self._total = status_info.total
         self._created = status_info.created
         self._updated = status_info.updated
         self._removed = status_info.removed
+        self._municipalities = status_info.municipalities
+        self._consecutive_failures = status_info.consecutive_failures
+        self._circuit_state = status_info.circuit_state
+        self._circuit_retry = status_info.circuit_retry
         self._attr_icon = ALERT_ICON if status_info.total > 0 else DEFAULT_ICON
 
     @property
@@ -141,6 +160,75 @@ class InMetSensor(SensorEntity):
                 (ATTR_CREATED, self._created),
                 (ATTR_UPDATED, self._updated),
                 (ATTR_REMOVED, self._removed),
+                (ATTR_MUNICIPALITIES, self._municipalities),
+                (ATTR_CONSECUTIVE_FAILURES, self._consecutive_failures),
+                (ATTR_CIRCUIT_STATE, self._circuit_state),
+                (ATTR_CIRCUIT_RETRY, self._circuit_retry),
             )
             if value or isinstance(value, bool)
         }
+
+
+class InMetPollSensor(SensorEntity):
+    """Diagnostic sensor with the timings and counters of the latest poll."""
+
+    _attr_should_poll = False
+    _attr_has_entity_name = True
+    _attr_translation_key = "poll"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_suggested_display_precision = 0
+
+    def __init__(self, config_entry: ConfigEntry, manager: InMetEntityManager) -> None:
+        """Initialize entity."""
+        assert config_entry.unique_id
+        self._config_entry_id = config_entry.entry_id
+        self._attr_unique_id = f"{config_entry.unique_id}_poll"
+        self._manager = manager
+        self._metrics: dict[str, float | int | None] = {}
+        self._remove_signal_status: Callable[[], None] | None = None
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.unique_id)},
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Call when entity is added to hass."""
+        self._remove_signal_status = async_dispatcher_connect(
+            self.hass,
+            f"inmet_status_{self._config_entry_id}",
+            self._update_status_callback,
+        )
+        await self.async_update()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Call when entity will be removed from hass."""
+        if self._remove_signal_status:
+            self._remove_signal_status()
+
+    @callback
+    def _update_status_callback(self) -> None:
+        """Call status update method."""
+        self.async_schedule_update_ha_state(True)
+
+    async def async_update(self) -> None:
+        """Update this entity from the latest poll metrics."""
+        status_info = self._manager.status_info()
+        if status_info:
+            self._metrics = status_info.metrics
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the HTTP latency of the latest poll, in milliseconds."""
+        latency = self._metrics.get(METRIC_HTTP_LATENCY)
+        return latency * 1000 if latency is not None else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the timings, in seconds, and counters of the latest poll."""
+        return {
+            key: value
+            for key, value in self._metrics.items()
+            if key != METRIC_POLL and value is not None
+        }
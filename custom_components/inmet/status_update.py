@@ -10,7 +10,7 @@ class StatusUpdate:
 
     def __init__(
         self,
-        status: str,
+        status: str | None,
         last_update: datetime | None,
         last_update_successful: datetime | None,
         last_timestamp: datetime | None,
@@ -18,9 +18,14 @@ class StatusUpdate:
         created: int,
         updated: int,
         removed: int,
+        municipalities: dict[str, int] | None = None,
+        consecutive_failures: int = 0,
+        circuit_state: str | None = None,
+        circuit_retry: datetime | None = None,
+        metrics: dict[str, float | int | None] | None = None,
     ) -> None:
         """Initialise this status update."""
-        self._status: str = status
+        self._status: str | None = status
         self._last_update: datetime | None = last_update
         self._last_update_successful: datetime | None = last_update_successful
         self._last_timestamp: datetime | None = last_timestamp
@@ -28,13 +33,18 @@ class StatusUpdate:
         self._created: int = created
         self._updated: int = updated
         self._removed: int = removed
+        self._municipalities: dict[str, int] = municipalities or {}
+        self._consecutive_failures: int = consecutive_failures
+        self._circuit_state: str | None = circuit_state
+        self._circuit_retry: datetime | None = circuit_retry
+        self._metrics: dict[str, float | int | None] = metrics or {}
 
     def __repr__(self):
         """Return string representation of this entry."""
         return f"<{self.__class__.__name__}({self.status}@{self.last_update})>"
 
     @property
-    def status(self) -> str:
+    def status(self) -> str | None:
         """Return the status."""
         return self._status
 
@@ -72,3 +82,28 @@ class StatusUpdate:
     def removed(self) -> int:
         """Return the number of removed entries."""
         return self._removed
+
+    @property
+    def municipalities(self) -> dict[str, int]:
+        """Return the number of alerts per subscribed municipality."""
+        return self._municipalities
+
+    @property
+    def consecutive_failures(self) -> int:
+        """Return the number of polls failed in a row."""
+        return self._consecutive_failures
+
+    @property
+    def circuit_state(self) -> str | None:
+        """Return the state of the circuit breaker guarding the feed."""
+        return self._circuit_state
+
+    @property
+    def circuit_retry(self) -> datetime | None:
+        """Return when an open circuit lets the next poll through."""
+        return self._circuit_retry
+
+    @property
+    def metrics(self) -> dict[str, float | int | None]:
+        """Return the timings and counters of the latest poll."""
+        return self._metrics
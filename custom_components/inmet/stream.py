@@ -0,0 +1,296 @@
+"""Incremental decoding of the InMet active alerts feed."""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+from collections.abc import AsyncIterable, Callable, Iterable
+from functools import partial
+import json
+from operator import itemgetter
+from queue import SimpleQueue
+import threading
+import time
+
+# Keys of the feed holding the lists of alerts.
+ALERT_LISTS = ("hoje", "futuro")
+
+_WHITESPACE = " \t\n\r"
+
+# Up to this many subscriptions, alerts are matched by substring search.
+MAX_NEEDLES = 32
+
+# Chunks read ahead of the parser, bounding the buffered response.
+MAX_QUEUED_CHUNKS = 4
+
+# Parser states.
+_START = 0
+_FIRST_KEY = 1
+_KEY = 2
+_COLON = 3
+_VALUE = 4
+_NEXT_KEY = 5
+_ARRAY_START = 6
+_FIRST_ALERT = 7
+_ALERT = 8
+_NEXT_ALERT = 9
+_DONE = 10
+
+# Returned while the value being decoded is not fully buffered.
+_INCOMPLETE = object()
+
+# Queued after the last chunk, or when reading the chunks failed.
+_END_OF_FEED = object()
+_ABORTED = object()
+
+
+class GeocodeFilter:
+    """Match alerts against subscribed geocodes and geocode prefixes."""
+
+    def __init__(self, codes: Iterable[str], prefixes: Iterable[str]) -> None:
+        """Initialize the filter."""
+        self.codes: frozenset[str] = frozenset(codes)
+        self.prefixes: tuple[str, ...] = tuple(sorted(set(prefixes)))
+        # Prefixes grouped by length, to match them as sets.
+        self._prefix_slices: list[tuple[itemgetter, frozenset[str]]] = [
+            (
+                itemgetter(slice(length)),
+                frozenset(prefix for prefix in self.prefixes if len(prefix) == length),
+            )
+            for length in sorted({len(prefix) for prefix in self.prefixes})
+        ]
+        # Few subscriptions are cheaper to find in the raw geocode list than
+        # splitting it into thousands of strings.
+        self._needles: tuple[str, ...] | None = None
+        if len(self.codes) + len(self.prefixes) <= MAX_NEEDLES:
+            self._needles = (
+                *(f",{code}," for code in self.codes),
+                *(f",{prefix}" for prefix in self.prefixes),
+            )
+
+    def matches(self, geocode: str) -> bool:
+        """Return True if a geocode is subscribed."""
+        return geocode in self.codes or geocode.startswith(self.prefixes)
+
+    def __call__(self, alert: dict) -> bool:
+        """Return True if an alert covers a subscribed geocode."""
+        if self._needles is not None:
+            haystack = f",{alert.get('geocodes', '')},"
+            return any(needle in haystack for needle in self._needles)
+        geocodes = alert.get("geocodes", "").split(",")
+        if not self.codes.isdisjoint(geocodes):
+            return True
+        return any(
+            not prefixes.isdisjoint(map(head, geocodes))
+            for head, prefixes in self._prefix_slices
+        )
+
+    def covers(self, codes: Iterable[str], prefixes: Iterable[str]) -> bool:
+        """Return True if every given code and prefix is matched by this filter."""
+        return all(map(self.matches, codes)) and all(
+            prefix.startswith(self.prefixes) for prefix in prefixes
+        )
+
+
+class AlertStreamParser:
+    """Decode the feed from text chunks, keeping only the wanted alerts.
+
+    Alert objects are decoded one at a time as their text arrives and
+    dropped unless kept by the filter, so memory is bounded by the largest
+    alert and the kept ones rather than by the whole national feed.
+    """
+
+    def __init__(self, keep: Callable[[dict], bool]) -> None:
+        """Initialize the parser."""
+        self._keep = keep
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._state = _START
+        self._key: str | None = None
+        self._closed = False
+        self.payload: dict = {}
+        self.scanned = 0
+        self.size = 0
+        self.decode_time = 0.0
+
+    def feed(self, text: str) -> None:
+        """Parse a chunk of the feed."""
+        self._buffer = self._buffer[self._position :] + text
+        self._position = 0
+        self._parse()
+
+    def close(self) -> dict:
+        """Finish parsing and return the filtered payload."""
+        self._closed = True
+        self._parse()
+        if self._state != _DONE:
+            raise ValueError("Truncated alerts feed")
+        if self._buffer[self._position :].strip(_WHITESPACE):
+            raise ValueError("Extra data after the alerts feed")
+        return self.payload
+
+    def _parse(self) -> None:
+        """Advance through the buffered text as far as it is complete."""
+        while self._state != _DONE:
+            char = self._next_char()
+            if char is None:
+                return
+            if self._state == _START:
+                self._expect(char, "{")
+                self._state = _FIRST_KEY
+            elif self._state == _FIRST_KEY and char == "}":
+                self._position += 1
+                self._state = _DONE
+            elif self._state in (_FIRST_KEY, _KEY):
+                position = self._position
+                if (key := self._decode()) is _INCOMPLETE:
+                    return
+                if not isinstance(key, str):
+                    raise ValueError(f"Expected a key at {position} of the alerts feed")
+                self._key = key
+                self._state = _COLON
+            elif self._state == _COLON:
+                self._expect(char, ":")
+                self._state = _ARRAY_START if self._key in ALERT_LISTS else _VALUE
+            elif self._state == _VALUE:
+                if (value := self._decode()) is _INCOMPLETE:
+                    return
+                self.payload[self._key] = value
+                self._state = _NEXT_KEY
+            elif self._state == _NEXT_KEY:
+                self._expect(char, ",}")
+                self._state = _KEY if char == "," else _DONE
+            elif self._state == _ARRAY_START:
+                if char != "[":
+                    self._state = _VALUE
+                    continue
+                self._position += 1
+                self.payload[self._key] = []
+                self._state = _FIRST_ALERT
+            elif self._state == _FIRST_ALERT and char == "]":
+                self._position += 1
+                self._state = _NEXT_KEY
+            elif self._state in (_FIRST_ALERT, _ALERT):
+                position = self._position
+                if (alert := self._decode()) is _INCOMPLETE:
+                    return
+                if not isinstance(alert, dict):
+                    raise ValueError(
+                        f"Expected an alert at {position} of the alerts feed"
+                    )
+                self.scanned += 1
+                if self._keep(alert):
+                    self.payload[self._key].append(alert)
+                self._state = _NEXT_ALERT
+            else:
+                self._expect(char, ",]")
+                self._state = _ALERT if char == "," else _NEXT_KEY
+
+    def _next_char(self) -> str | None:
+        """Skip whitespace and return the next character, if buffered."""
+        buffer = self._buffer
+        position = self._position
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        self._position = position
+        return buffer[position] if position < len(buffer) else None
+
+    def _expect(self, char: str, expected: str) -> None:
+        """Consume one of the expected structural characters."""
+        if char not in expected:
+            raise ValueError(
+                f"Expected {' or '.join(map(repr, expected))} at {self._position}"
+                " of the alerts feed"
+            )
+        self._position += 1
+
+    def _decode(self) -> object | None:
+        """Decode the value at the position, once it is fully buffered."""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._position)
+        except json.JSONDecodeError:
+            if self._closed:
+                raise
+            return _INCOMPLETE
+        # A number may continue in the next chunk.
+        if end == len(self._buffer) and not self._closed:
+            return _INCOMPLETE
+        self._position = end
+        return value
+
+
+async def async_parse_alerts(
+    chunks: AsyncIterable[bytes], keep: Callable[[dict], bool], encoding: str = "utf-8"
+) -> AlertStreamParser:
+    """Parse the feed from a stream of byte chunks.
+
+    The event loop only reads the chunks and queues them to the parser
+    running in the executor, waiting for it once MAX_QUEUED_CHUNKS are
+    pending. The parser counts the bytes read and the time spent decoding
+    them, not waiting for them.
+    """
+    loop = asyncio.get_running_loop()
+    parser = AlertStreamParser(keep)
+    queue: SimpleQueue[bytes | object] = SimpleQueue()
+    # A slot is released by the parser for every chunk it takes.
+    slots = asyncio.Semaphore(MAX_QUEUED_CHUNKS)
+    rejected = threading.Event()
+    parsing = loop.run_in_executor(
+        None,
+        _parse_queued_chunks,
+        parser,
+        queue,
+        encoding,
+        partial(loop.call_soon_threadsafe, slots.release),
+        rejected,
+    )
+    try:
+        async for chunk in chunks:
+            await slots.acquire()
+            if rejected.is_set():
+                # The parser rejected the feed, stop reading it.
+                break
+            queue.put(chunk)
+    except BaseException:
+        queue.put(_ABORTED)
+        raise
+    queue.put(_END_OF_FEED)
+    return await parsing
+
+
+def _parse_queued_chunks(
+    parser: AlertStreamParser,
+    queue: SimpleQueue[bytes | object],
+    encoding: str,
+    release: Callable[[], object],
+    rejected: threading.Event,
+) -> AlertStreamParser:
+    """Parse the byte chunks taken from a queue until the end of the feed.
+
+    Once the feed is rejected the remaining chunks are still taken, so the
+    reader waiting for a slot is not left blocked.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    error: ValueError | None = None
+    while (chunk := queue.get()) is not _END_OF_FEED:
+        if chunk is _ABORTED:
+            return parser
+        release()
+        if error is not None:
+            continue
+        started = time.perf_counter()
+        parser.size += len(chunk)
+        try:
+            parser.feed(decoder.decode(chunk))
+        except ValueError as err:
+            error = err
+            rejected.set()
+        parser.decode_time += time.perf_counter() - started
+    if error is not None:
+        raise error
+    started = time.perf_counter()
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    parser.decode_time += time.perf_counter() - started
+    return parser
@@ -0,0 +1,207 @@
+"""Deterministic synthetic payloads of the InMet active alerts endpoint.
+
+Usage: python -m fakes.feed [--alerts 1000] [--geocodes 100 3000] [--seed 0]
+
+The payloads follow the avisos/ativos schema read by the integration: the
+current alerts under "hoje", the upcoming ones under "futuro". The same
+seed and reference time always give the same payload.
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+import json
+import random
+import sys
+from zoneinfo import ZoneInfo
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# Alert times are Brasília time, mirror of feed_manager.ALERT_TIMEZONE.
+ALERT_TIMEZONE = ZoneInfo("America/Sao_Paulo")
+
+# IBGE codes of the states, mirror of const.STATE_CODES.
+# fmt: off
+STATE_CODES = (
+    "11", "12", "13", "14", "15", "16", "17", "21", "22", "23", "24", "25", "26",
+    "27", "28", "29", "31", "32", "33", "35", "41", "42", "43", "50", "51", "52",
+    "53",
+)
+# fmt: on
+
+# Severity id, name and color.
+SEVERITIES = (
+    (1, "Perigo Potencial", "#FFFF00"),
+    (2, "Perigo", "#FFA500"),
+    (3, "Grande Perigo", "#FF0000"),
+)
+
+EVENTS = {
+    "Acumulado de Chuva": (
+        "Chuva entre 20 e 30 mm/h ou até 50 mm/dia",
+        "Baixo risco de alagamentos e pequenos deslizamentos.",
+    ),
+    "Chuvas Intensas": (
+        "Chuva entre 30 e 60 mm/h ou 50 e 100 mm/dia",
+        "Risco de alagamentos, deslizamentos de encostas e transbordamentos.",
+    ),
+    "Tempestade": (
+        "Ventos intensos (60-100 km/h) e queda de granizo.",
+        "Risco de corte de energia elétrica e queda de árvores.",
+    ),
+    "Onda de Calor": (
+        "Temperatura 5 ºC acima da média por 3 a 5 dias.",
+        "Baixo risco à saúde.",
+    ),
+    "Baixa Umidade": (
+        "Umidade relativa do ar variando entre 20% e 30%.",
+        "Baixo risco de incêndios florestais e à saúde.",
+    ),
+}
+
+INSTRUCTIONS = (
+    "Evite enfrentar o mau tempo.",
+    "Em caso de rajadas de vento, não se abrigue debaixo de árvores.",
+    "Evite usar aparelhos eletrônicos ligados à tomada.",
+    "Obtenha mais informações junto à Defesa Civil (telefone 199) e ao Corpo de"
+    " Bombeiros (telefone 193).",
+)
+
+
+class FeedGenerator:
+    """Generate alerts over a fixed set of synthetic municipalities."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        municipalities: int = 5570,
+        now: datetime | None = None,
+    ) -> None:
+        """Initialize the generator.
+
+        Alert times are relative to now in Brasília time, truncated to the
+        hour; pass it for payloads that do not depend on the clock. A naive
+        now is taken as Brasília time.
+        """
+        self._random = random.Random(seed)
+        if now is None:
+            now = datetime.now(ALERT_TIMEZONE)
+        elif now.tzinfo is not None:
+            now = now.astimezone(ALERT_TIMEZONE)
+        self.now = now.replace(minute=0, second=0, microsecond=0)
+        per_state = -(-municipalities // len(STATE_CODES))
+        self.geocodes = [
+            f"{state}{number:05d}"
+            for number in range(1, per_state * 10, 10)
+            for state in STATE_CODES
+        ][:municipalities]
+        self._next_id = 1
+
+    def alert(self, future: bool, geocodes: tuple[int, int] = (50, 2000)) -> dict:
+        """Return an alert covering a random set of municipalities."""
+        rng = self._random
+        alert_id = self._next_id
+        self._next_id += 1
+        description, (risk, effect) = rng.choice(list(EVENTS.items()))
+        severity_id, severity, color = rng.choice(SEVERITIES)
+        count = min(rng.randint(*geocodes), len(self.geocodes))
+        if future:
+            start = self.now + timedelta(hours=rng.randint(1, 48))
+        else:
+            start = self.now - timedelta(hours=rng.randint(0, 24))
+        end = max(start, self.now) + timedelta(hours=rng.randint(1, 72))
+        return {
+            "id": alert_id,
+            "id_sequencia": rng.randint(0, 3),
+            "descricao": description,
+            "severidade": severity,
+            "id_severidade": severity_id,
+            "aviso_cor": color,
+            "riscos": [risk, effect],
+            "instrucoes": rng.sample(INSTRUCTIONS, rng.randint(1, len(INSTRUCTIONS))),
+            "geocodes": ",".join(sorted(rng.sample(self.geocodes, count))),
+            "inicio": start.strftime(DATE_FORMAT),
+            "fim": end.strftime(DATE_FORMAT),
+            "alterado": False,
+            "encerrado": False,
+        }
+
+    def payload(
+        self,
+        alerts: int = 100,
+        geocodes: tuple[int, int] = (50, 2000),
+        future_ratio: float = 0.3,
+    ) -> dict:
+        """Return a feed of new alerts, a share of them upcoming."""
+        future = round(alerts * future_ratio)
+        return {
+            "hoje": [self.alert(False, geocodes) for _ in range(alerts - future)],
+            "futuro": [self.alert(True, geocodes) for _ in range(future)],
+        }
+
+    def churn(
+        self,
+        payload: dict,
+        rate: float = 0.1,
+        geocodes: tuple[int, int] = (50, 2000),
+    ) -> dict:
+        """Return the next version of a feed.
+
+        About rate of the alerts are each changed, ended or replaced by a new
+        one; the given payload is not modified.
+        """
+        rng = self._random
+        churned: dict[str, list[dict]] = {"hoje": [], "futuro": []}
+        for key in ("hoje", "futuro"):
+            for alert in payload[key]:
+                if rng.random() >= rate:
+                    churned[key].append(alert)
+                    continue
+                change = rng.randrange(3)
+                if change == 0:
+                    end = datetime.strptime(alert["fim"], DATE_FORMAT)
+                    churned[key].append(
+                        {
+                            **alert,
+                            "fim": (end + timedelta(hours=6)).strftime(DATE_FORMAT),
+                            "alterado": True,
+                        }
+                    )
+                elif change == 1:
+                    churned[key].append({**alert, "encerrado": True})
+                else:
+                    churned[key].append(self.alert(key == "futuro", geocodes))
+        return churned
+
+
+def generate_feed(
+    alerts: int = 100,
+    geocodes: tuple[int, int] = (50, 2000),
+    future_ratio: float = 0.3,
+    seed: int = 0,
+    now: datetime | None = None,
+) -> dict:
+    """Return a synthetic feed."""
+    return FeedGenerator(seed, now=now).payload(alerts, geocodes, future_ratio)
+
+
+def main() -> None:
+    """Write a synthetic feed to stdout."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--alerts", type=int, default=1000)
+    parser.add_argument(
+        "--geocodes", nargs=2, type=int, default=(100, 3000), metavar=("MIN", "MAX")
+    )
+    parser.add_argument("--future-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    json.dump(
+        generate_feed(args.alerts, tuple(args.geocodes), args.future_ratio, args.seed),
+        sys.stdout,
+        ensure_ascii=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
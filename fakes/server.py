@@ -0,0 +1,182 @@
+"""Local stand-in for the InMet API.
+
+Usage: python -m fakes.server [--port 8080] [--payload feed.json] [options]
+
+Serves /avisos/ativos and /autocomplete/{name} from a recorded payload or
+a synthetic feed, with conditional requests answered by 304, and injected
+latency, errors and payload churn. Point the integration at it with:
+
+    inmet:
+      base_url: http://localhost:8080
+
+Request counters are served at /_stats.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from email.utils import formatdate
+import hashlib
+import json
+from pathlib import Path
+import random
+import time
+
+from aiohttp import hdrs, web
+
+from .feed import FeedGenerator
+
+ALERTS_PATH = "/avisos/ativos"
+AUTOCOMPLETE_PATH = "/autocomplete/{name}"
+STATS_PATH = "/_stats"
+
+
+class FakeInMetServer:
+    """Serve a feed that changes every few requests."""
+
+    def __init__(
+        self,
+        generator: FeedGenerator | None = None,
+        payload: dict | None = None,
+        cities: list[dict] | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_statuses: tuple[int, ...] = (500, 502, 503),
+        churn_every: int = 0,
+        churn_rate: float = 0.1,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the server.
+
+        Without a payload the generator makes one. The feed churns once
+        every churn_every alert requests, never if it is 0.
+        """
+        self.generator = generator or FeedGenerator(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.churn_every = churn_every
+        self.churn_rate = churn_rate
+        self.cities = cities if cities is not None else self._default_cities()
+        self.stats = {"alerts": 0, "not_modified": 0, "errors": 0, "autocomplete": 0}
+        self._random = random.Random(seed)
+        self._set_payload(payload or self.generator.payload())
+
+    def _default_cities(self) -> list[dict]:
+        """Return a city per geocode of the generator."""
+        return [
+            {
+                "geocode": geocode,
+                "label": f"Município {geocode}",
+                "latitude": -15.0,
+                "longitude": -47.0,
+            }
+            for geocode in self.generator.geocodes
+        ]
+
+    def _set_payload(self, payload: dict) -> None:
+        """Serve a new version of the feed."""
+        self.payload = payload
+        self.body = json.dumps(payload, ensure_ascii=False).encode()
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+        self.last_modified = formatdate(time.time(), usegmt=True)
+
+    def app(self) -> web.Application:
+        """Return the web application."""
+        app = web.Application()
+        app.router.add_get(ALERTS_PATH, self.alerts)
+        app.router.add_get(AUTOCOMPLETE_PATH, self.autocomplete)
+        app.router.add_get(STATS_PATH, self.get_stats)
+        return app
+
+    async def _delay(self) -> None:
+        """Wait the injected latency."""
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _error(self) -> web.Response | None:
+        """Return an injected error response, if any."""
+        if self._random.random() >= self.error_rate:
+            return None
+        self.stats["errors"] += 1
+        return web.Response(status=self._random.choice(self.error_statuses))
+
+    async def alerts(self, request: web.Request) -> web.Response:
+        """Serve the active alerts."""
+        await self._delay()
+        if error := self._error():
+            return error
+        self.stats["alerts"] += 1
+        if self.churn_every and self.stats["alerts"] % self.churn_every == 0:
+            self._set_payload(self.generator.churn(self.payload, self.churn_rate))
+
+        headers = {hdrs.ETAG: self.etag, hdrs.LAST_MODIFIED: self.last_modified}
+        if request.headers.get(hdrs.IF_NONE_MATCH) == self.etag:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers=headers)
+        return web.Response(
+            body=self.body, content_type="application/json", headers=headers
+        )
+
+    async def autocomplete(self, request: web.Request) -> web.Response:
+        """Serve the cities whose label contains the name."""
+        await self._delay()
+        if error := self._error():
+            return error
+        self.stats["autocomplete"] += 1
+        name = request.match_info["name"].casefold()
+        return web.json_response(
+            [city for city in self.cities if name in city["label"].casefold()][:10]
+        )
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        """Serve the request counters."""
+        return web.json_response(self.stats)
+
+
+def main() -> None:
+    """Run the server."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--payload", type=Path, help="recorded avisos/ativos body")
+    parser.add_argument("--cities", type=Path, help="recorded autocomplete body")
+    parser.add_argument("--alerts", type=int, default=100)
+    parser.add_argument(
+        "--geocodes", nargs=2, type=int, default=(50, 2000), metavar=("MIN", "MAX")
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--churn-every", type=int, default=0, help="requests")
+    parser.add_argument("--churn-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    generator = FeedGenerator(args.seed)
+    server = FakeInMetServer(
+        generator,
+        payload=(
+            json.loads(args.payload.read_text(encoding="utf-8"))
+            if args.payload
+            else generator.payload(args.alerts, tuple(args.geocodes))
+        ),
+        cities=(
+            json.loads(args.cities.read_text(encoding="utf-8")) if args.cities else None
+        ),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        churn_every=args.churn_every,
+        churn_rate=args.churn_rate,
+        seed=args.seed,
+    )
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Build the bundled municipality dataset used by the InMet city search.
+
+Usage: python script/build_municipalities.py [source.csv [cities500.txt]]
+
+The source is the municipality table of
+https://github.com/kelvins/municipios-brasileiros (MIT), with the IBGE code,
+name, coordinates and state code of all Brazilian municipalities. The
+population of each municipality seat comes from the GeoNames cities500 dump
+(https://www.geonames.org, CC BY 4.0), matched by name and distance, and
+breaks ties in the city search. Both are downloaded when no local copy is
+given.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from pathlib import Path
+import sys
+import unicodedata
+from urllib.request import urlopen
+import zipfile
+
+SOURCE_URL = (
+    "https://raw.githubusercontent.com/kelvins/municipios-brasileiros/main/"
+    "csv/municipios.csv"
+)
+GEONAMES_URL = "https://download.geonames.org/export/dump/cities500.zip"
+TARGET = (
+    Path(__file__).parent.parent / "custom_components" / "inmet" / "municipalities.json"
+)
+
+# GeoNames places farther than this, in degrees, from the municipality seat
+# are other places with the same name.
+MAX_DISTANCE = 0.3
+
+# Mirror of const.STATE_CODES, kept here so the script runs without Home Assistant.
+STATES = {
+    "11": "RO",
+    "12": "AC",
+    "13": "AM",
+    "14": "RR",
+    "15": "PA",
+    "16": "AP",
+    "17": "TO",
+    "21": "MA",
+    "22": "PI",
+    "23": "CE",
+    "24": "RN",
+    "25": "PB",
+    "26": "PE",
+    "27": "AL",
+    "28": "SE",
+    "29": "BA",
+    "31": "MG",
+    "32": "ES",
+    "33": "RJ",
+    "35": "SP",
+    "41": "PR",
+    "42": "SC",
+    "43": "RS",
+    "50": "MS",
+    "51": "MT",
+    "52": "GO",
+    "53": "DF",
+}
+
+
+def read_source(argv: list[str]) -> str:
+    """Return the CSV source, from a file or downloaded."""
+    if len(argv) > 1:
+        return Path(argv[1]).read_text(encoding="utf-8")
+    with urlopen(SOURCE_URL, timeout=60) as response:
+        return response.read().decode("utf-8")
+
+
+def read_geonames(argv: list[str]) -> str:
+    """Return the GeoNames cities dump, from a file or downloaded."""
+    if len(argv) > 2:
+        return Path(argv[2]).read_text(encoding="utf-8")
+    with urlopen(GEONAMES_URL, timeout=60) as response:
+        with zipfile.ZipFile(io.BytesIO(response.read())) as archive:
+            return archive.read("cities500.txt").decode("utf-8")
+
+
+def normalize(name: str) -> str:
+    """Mirror of municipalities.normalize, without Home Assistant."""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    folded = "".join(
+        char if char.isalnum() else " "
+        for char in decomposed
+        if not unicodedata.combining(char)
+    )
+    return " ".join(folded.split())
+
+
+def brazilian_places(dump: str) -> dict[str, list[tuple[float, float, int]]]:
+    """Return the coordinates and population of the Brazilian places by name."""
+    places: dict[str, list[tuple[float, float, int]]] = {}
+    for fields in csv.reader(io.StringIO(dump), delimiter="\t", quoting=csv.QUOTE_NONE):
+        if fields[8] != "BR":
+            continue
+        place = (float(fields[4]), float(fields[5]), int(fields[14] or 0))
+        for name in {normalize(fields[1]), normalize(fields[2])}:
+            places.setdefault(name, []).append(place)
+    return places
+
+
+def population(
+    places: dict[str, list[tuple[float, float, int]]],
+    name: str,
+    latitude: float,
+    longitude: float,
+) -> int:
+    """Return the population of the place named as a municipality near its seat."""
+    return max(
+        (
+            people
+            for place_latitude, place_longitude, people in places.get(
+                normalize(name), ()
+            )
+            if abs(place_latitude - latitude) <= MAX_DISTANCE
+            and abs(place_longitude - longitude) <= MAX_DISTANCE
+        ),
+        default=0,
+    )
+
+
+def main(argv: list[str]) -> None:
+    """Write the compact dataset."""
+    places = brazilian_places(read_geonames(argv))
+    rows = [
+        [
+            int(row["codigo_ibge"]),
+            row["nome"],
+            STATES[row["codigo_uf"]],
+            round(float(row["latitude"]), 4),
+            round(float(row["longitude"]), 4),
+            population(
+                places, row["nome"], float(row["latitude"]), float(row["longitude"])
+            ),
+        ]
+        for row in csv.DictReader(io.StringIO(read_source(argv)))
+    ]
+    rows.sort(key=lambda row: row[0])
+    TARGET.write_text(
+        json.dumps(
+            {"version": 2, "municipalities": rows},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ),
+        encoding="utf-8",
+    )
+    matched = sum(1 for row in rows if row[5])
+    print(f"Wrote {len(rows)} municipalities to {TARGET}, {matched} with population")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,73 @@
+"""Tests for the InMet bounded cache."""
+
+from __future__ import annotations
+
+from custom_components.inmet.cache import TTLCache
+
+
+class FakeTimer:
+    """Clock advanced by hand."""
+
+    def __init__(self) -> None:
+        """Start the clock."""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+def test_cache_expiry() -> None:
+    """Test entries expire once their time to live has passed."""
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=4, ttl=60, timer=timer)
+    cache.set("campinas", ["3509502"])
+
+    timer.now += 59
+    assert cache.get("campinas") == ["3509502"]
+
+    timer.now += 1
+    assert cache.get("campinas") is None
+    assert len(cache) == 0
+
+    # Setting an entry again starts its time to live over.
+    cache.set("campinas", ["3509502"])
+    timer.now += 59
+    assert cache.get("campinas") == ["3509502"]
+
+
+def test_cache_eviction_order() -> None:
+    """Test the least recently used entry is evicted beyond maxsize."""
+    cache = TTLCache(maxsize=2, ttl=60, timer=FakeTimer())
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Reading "a" makes "b" the least recently used.
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    # Setting an existing entry refreshes it as well.
+    cache.set("a", 10)
+    cache.set("d", 4)
+    assert cache.get("c") is None
+    assert cache.get("a") == 10
+    assert len(cache) == 2
+
+
+def test_cache_stats() -> None:
+    """Test hits, misses and expired reads are counted."""
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=8, ttl=60, timer=timer)
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 8}
+
+    cache.get("a")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    timer.now += 60
+    cache.get("a")
+
+    assert cache.stats() == {"hits": 2, "misses": 2, "size": 0, "maxsize": 8}
@@ -0,0 +1,532 @@
+"""Tests for the InMet feed manager."""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+import json
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+
+from custom_components.inmet.feed_manager import (
+    ALERT_DATE_FORMAT,
+    ALERT_TIMEZONE,
+    TRANSITION_END,
+    TRANSITION_START,
+    InMetFeed,
+    InMetFeedIndex,
+    InMetFeedManager,
+)
+from custom_components.inmet.retry import RetryPolicy
+
+NOW = datetime(2024, 1, 10, 12, 0, tzinfo=ALERT_TIMEZONE)
+
+
+def alert_time(minutes: int) -> str:
+    """Return an alert time relative to NOW."""
+    return (NOW + timedelta(minutes=minutes)).strftime(ALERT_DATE_FORMAT)
+
+
+def feed_payload() -> dict:
+    """Return a feed with a running alert and an upcoming one."""
+    return {
+        "hoje": [
+            {
+                "id": 1,
+                "geocodes": "3509502,3550308",
+                "severidade": "Perigo",
+                "id_severidade": 2,
+                "inicio": alert_time(-60),
+                "fim": alert_time(30),
+            }
+        ],
+        "futuro": [
+            {
+                "id": 2,
+                "geocodes": "3509502",
+                "severidade": "Perigo Potencial",
+                "id_severidade": 1,
+                "inicio": alert_time(10),
+                "fim": alert_time(60),
+            }
+        ],
+    }
+
+
+class Signals:
+    """Record the signals sent by a feed manager."""
+
+    def __init__(self) -> None:
+        """Initialize the recorder."""
+        self.signals: list[tuple[str, object]] = []
+
+    async def generate(self, alert_ids: list[str]) -> None:
+        """Record new entities."""
+        self.signals.append(("new", alert_ids))
+
+    async def update(self, alert_id: str) -> None:
+        """Record an entity update."""
+        self.signals.append(("update", alert_id))
+
+    async def remove(self, alert_id: str) -> None:
+        """Record an entity removal."""
+        self.signals.append(("remove", alert_id))
+
+    def pop(self) -> list[tuple[str, object]]:
+        """Return and clear the recorded signals."""
+        signals, self.signals = self.signals, []
+        return signals
+
+
+@pytest.fixture
+def signals() -> Signals:
+    """Return a signal recorder."""
+    return Signals()
+
+
+def feed_manager(feed: InMetFeed, signals: Signals) -> InMetFeedManager:
+    """Return a feed manager following Campinas."""
+    return InMetFeedManager(
+        feed, signals.generate, signals.update, signals.remove, ["3509502"]
+    )
+
+
+async def fire_transition_timer(manager: InMetFeedManager) -> None:
+    """Run the armed transition timer and wait for the transitions it fires."""
+    manager._transition_timer.cancel()
+    manager._transition_due()
+    await manager._transition_task
+
+
+async def test_transitions_heap(freezer: FrozenDateTimeFactory, signals) -> None:
+    """Test a timer is armed for the earliest start or end."""
+    freezer.move_to(NOW)
+    manager = feed_manager(InMetFeed(None), signals)
+
+    await manager.update_from_index(InMetFeedIndex(feed_payload()))
+
+    assert signals.pop() == [("new", [1, 2])]
+    assert sorted(
+        (when, kind, alert_id) for when, _, kind, alert_id in manager._transitions
+    ) == [
+        (NOW + timedelta(minutes=10), TRANSITION_START, 2),
+        (NOW + timedelta(minutes=30), TRANSITION_END, 1),
+        (NOW + timedelta(minutes=60), TRANSITION_END, 2),
+    ]
+    assert manager._transitions[0][2:] == (TRANSITION_START, 2)
+    loop = asyncio.get_running_loop()
+    assert manager._transition_timer.when() - loop.time() == pytest.approx(600, abs=1)
+
+    manager.stop()
+    assert manager._transition_timer is None
+    assert not manager._transitions
+
+
+def test_index_future_alerts(freezer: FrozenDateTimeFactory) -> None:
+    """Test each upcoming alert is marked future from its own start."""
+    freezer.move_to(NOW)
+    payload = {
+        "hoje": [],
+        "futuro": [
+            {
+                "id": alert_id,
+                "geocodes": "3509502",
+                "inicio": alert_time(start),
+                "fim": alert_time(start + 60),
+            }
+            for alert_id, start in ((1, -10), (2, 10 * 60), (3, 15 * 60))
+        ],
+    }
+
+    index = InMetFeedIndex(payload)
+
+    assert [(alert["id"], alert["future"]) for alert in index.alerts("3509502")] == [
+        (1, False),
+        (2, True),
+        (3, True),
+    ]
+
+
+def prefix_payload() -> dict:
+    """Return a feed of running alerts over São Paulo and Paraná."""
+    return {
+        "hoje": [
+            {
+                "id": alert_id,
+                "geocodes": geocodes,
+                "inicio": alert_time(-60),
+                "fim": alert_time(120),
+            }
+            for alert_id, geocodes in (
+                (1, "3509502,3550308"),
+                (2, "3509502,4106902"),
+                (3, "4106902"),
+                (4, "3550308,3509502"),
+            )
+        ],
+        "futuro": [],
+    }
+
+
+@pytest.mark.parametrize(
+    ("prefix", "alert_ids"),
+    [
+        ("35", [1, 2, 4]),
+        ("3550308", [1, 4]),
+        ("41", [2, 3]),
+        ("4", [2, 3]),
+        ("", [1, 2, 4, 3]),
+        ("36", []),
+    ],
+)
+def test_index_alerts_with_prefix(
+    freezer: FrozenDateTimeFactory, prefix: str, alert_ids: list[int]
+) -> None:
+    """Test alerts touching several matching geocodes are listed once."""
+    freezer.move_to(NOW)
+    index = InMetFeedIndex(prefix_payload())
+
+    assert [alert["id"] for alert in index.alerts_with_prefix(prefix)] == alert_ids
+    # Resolved prefixes are cached.
+    assert [alert["id"] for alert in index.alerts_with_prefix(prefix)] == alert_ids
+
+
+async def test_prefix_and_code_subscriptions(
+    freezer: FrozenDateTimeFactory, signals
+) -> None:
+    """Test an alert matched by a city code and a prefix is managed once."""
+    freezer.move_to(NOW)
+    statuses = []
+
+    async def status(status_info) -> None:
+        statuses.append(status_info)
+
+    manager = InMetFeedManager(
+        InMetFeed(None),
+        signals.generate,
+        signals.update,
+        signals.remove,
+        ["3509502"],
+        status,
+        geocode_prefixes=["41"],
+    )
+    await manager.update_from_index(InMetFeedIndex(prefix_payload()))
+
+    assert signals.pop() == [("new", [1, 2, 3, 4])]
+    assert [alert["id"] for alert in manager.alerts()] == [1, 2, 4, 3]
+    assert manager._alerts.matches(2) == ["3509502", "41"]
+    assert manager._alerts.matches(3) == ["41"]
+    assert statuses[-1].total == 4
+    assert statuses[-1].municipalities == {"3509502": 3, "41": 2}
+
+    manager.stop()
+
+
+async def test_transitions_fire(freezer: FrozenDateTimeFactory, signals) -> None:
+    """Test the timer starts and expires alerts when their time comes."""
+    freezer.move_to(NOW)
+    manager = feed_manager(InMetFeed(None), signals)
+    await manager.update_from_index(InMetFeedIndex(feed_payload()))
+    signals.pop()
+
+    freezer.move_to(NOW + timedelta(minutes=10))
+    await fire_transition_timer(manager)
+
+    assert signals.pop() == [("update", 2)]
+    assert manager.get(2)["future"] is False
+    assert manager._transitions[0][2:] == (TRANSITION_END, 1)
+
+    freezer.move_to(NOW + timedelta(minutes=30))
+    await fire_transition_timer(manager)
+
+    assert signals.pop() == [("remove", 1)]
+    assert manager.alerts() == [manager.get(2)]
+    assert manager._transitions[0][2:] == (TRANSITION_END, 2)
+
+    manager.stop()
+
+
+async def test_transitions_keep_shared_index(
+    freezer: FrozenDateTimeFactory, signals
+) -> None:
+    """Test transitions do not change the alerts shared through the index."""
+    freezer.move_to(NOW)
+    payload = feed_payload()
+    feed = InMetFeed(None)
+    feed._index = InMetFeedIndex(payload)
+    manager = feed_manager(feed, signals)
+    await manager.update()
+    signals.pop()
+
+    freezer.move_to(NOW + timedelta(minutes=10))
+    await manager._process_transitions()
+    assert signals.pop() == [("update", 2)]
+    assert payload["futuro"][0]["future"] is True
+
+    # Filtering the held index again agrees with the transition.
+    await manager.update()
+    assert signals.pop() == []
+
+    freezer.move_to(NOW + timedelta(minutes=30))
+    await manager._process_transitions()
+    assert signals.pop() == [("remove", 1)]
+
+    # The expired alert is still in the held index, but is not created again.
+    await manager.update()
+    assert signals.pop() == []
+
+    other = feed_manager(feed, signals)
+    await other.update()
+    assert signals.pop() == [("new", [2])]
+    assert other.get(2)["future"] is False
+
+    manager.stop()
+    other.stop()
+
+
+async def test_last_update_utc(freezer: FrozenDateTimeFactory, signals) -> None:
+    """Test the update times are recorded as aware UTC datetimes."""
+    freezer.move_to(NOW)
+    manager = feed_manager(InMetFeed(None), signals)
+
+    await manager.update_from_index(InMetFeedIndex(feed_payload()))
+    assert manager._last_update == manager._last_update_successful == NOW
+    assert manager._last_update.tzinfo == timezone.utc
+
+    freezer.move_to(NOW + timedelta(minutes=5))
+    await manager.update_failed()
+    assert manager._last_update == NOW + timedelta(minutes=5)
+    assert manager._last_update.tzinfo == timezone.utc
+    assert manager._last_update_successful == NOW
+
+    await manager.update_not_modified()
+    assert manager._last_update_successful == NOW + timedelta(minutes=5)
+
+    manager.stop()
+
+
+async def test_fingerprint_gated_updates(
+    freezer: FrozenDateTimeFactory, signals
+) -> None:
+    """Test only the alerts whose content changed are updated."""
+    freezer.move_to(NOW)
+    statuses = []
+
+    async def status(status_info) -> None:
+        statuses.append(status_info)
+
+    manager = InMetFeedManager(
+        InMetFeed(None),
+        signals.generate,
+        signals.update,
+        signals.remove,
+        ["3509502"],
+        status,
+    )
+    await manager.update_from_index(InMetFeedIndex(feed_payload()))
+    assert signals.pop() == [("new", [1, 2])]
+
+    # Refetching the same alerts, as new dicts, changes nothing.
+    await manager.update_from_index(InMetFeedIndex(feed_payload()))
+    assert signals.pop() == []
+    assert (statuses[-1].created, statuses[-1].updated) == (0, 0)
+
+    payload = feed_payload()
+    payload["hoje"][0]["severidade"] = "Grande Perigo"
+    await manager.update_from_index(InMetFeedIndex(payload))
+    assert signals.pop() == [("update", 1)]
+    status_info = statuses[-1]
+    assert (status_info.created, status_info.updated, status_info.removed) == (0, 1, 0)
+
+    manager.stop()
+
+
+def running_alerts(count: int, version: int = 0) -> dict:
+    """Return a feed of running alerts over Campinas, at a content version."""
+    return {
+        "hoje": [
+            {
+                "id": alert_id,
+                "geocodes": "3509502",
+                "descricao": f"Tempestade v{version}",
+                "inicio": alert_time(-60),
+                "fim": alert_time(120),
+            }
+            for alert_id in range(1, count + 1)
+        ],
+        "futuro": [],
+    }
+
+
+async def test_fan_out_isolates_failures(
+    freezer: FrozenDateTimeFactory, signals
+) -> None:
+    """Test a failing update does not stop the others and is retried."""
+    freezer.move_to(NOW)
+    failing = {2}
+
+    async def update(alert_id: str) -> None:
+        if alert_id in failing:
+            raise RuntimeError("Entity not ready")
+        await signals.update(alert_id)
+
+    manager = InMetFeedManager(
+        InMetFeed(None), signals.generate, update, signals.remove, ["3509502"]
+    )
+    await manager.update_from_index(InMetFeedIndex(running_alerts(3)))
+    signals.pop()
+
+    await manager.update_from_index(InMetFeedIndex(running_alerts(3, 1)))
+    assert sorted(signals.pop()) == [("update", 1), ("update", 3)]
+
+    # The failed update kept its old fingerprint, so it is sent again.
+    failing.clear()
+    await manager.update_from_index(InMetFeedIndex(running_alerts(3, 1)))
+    assert signals.pop() == [("update", 2)]
+
+    await manager.update_from_index(InMetFeedIndex(running_alerts(3, 1)))
+    assert signals.pop() == []
+
+    manager.stop()
+
+
+async def test_fan_out_concurrency(freezer: FrozenDateTimeFactory, signals) -> None:
+    """Test slow callbacks run at most fan_out_concurrency at a time."""
+    freezer.move_to(NOW)
+    release = asyncio.Event()
+    started = []
+
+    async def update(alert_id: str) -> None:
+        started.append(alert_id)
+        await release.wait()
+
+    manager = InMetFeedManager(
+        InMetFeed(None),
+        signals.generate,
+        update,
+        signals.remove,
+        ["3509502"],
+        fan_out_concurrency=2,
+    )
+    await manager.update_from_index(InMetFeedIndex(running_alerts(6)))
+
+    updating = asyncio.create_task(
+        manager.update_from_index(InMetFeedIndex(running_alerts(6, 1)))
+    )
+    for _ in range(10):
+        await asyncio.sleep(0)
+    assert len(started) == 2
+
+    release.set()
+    await updating
+    assert sorted(started) == [1, 2, 3, 4, 5, 6]
+
+    manager.stop()
+
+
+class FakeContent:
+    """Response body read in small chunks, paused after the first one."""
+
+    def __init__(self, body: bytes, resume: asyncio.Event) -> None:
+        """Initialize the body."""
+        self._body = body
+        self._resume = resume
+
+    async def iter_chunked(self, size: int):
+        """Yield the body in chunks of at most 16 bytes."""
+        for start in range(0, len(self._body), 16):
+            yield self._body[start : start + 16]
+            await self._resume.wait()
+
+
+class FakeResponse:
+    """Full response to the active alerts request."""
+
+    def __init__(self, content: FakeContent) -> None:
+        """Initialize the response."""
+        self.status = 200
+        self.headers: dict[str, str] = {}
+        self.content = content
+
+
+class FakeApi:
+    """API client serving a payload, holding its body while paused."""
+
+    def __init__(self, payload: dict) -> None:
+        """Initialize the client."""
+        self._body = json.dumps(payload).encode()
+        self.requests = 0
+        self.streaming = asyncio.Event()
+        self.resume = asyncio.Event()
+        self.resume.set()
+
+    @asynccontextmanager
+    async def get(self, path: str, **kwargs):
+        """Serve the payload."""
+        self.requests += 1
+        self.streaming.set()
+        yield FakeResponse(FakeContent(self._body, self.resume))
+
+
+def subscriber(
+    feed: InMetFeed, signals: Signals, city_codes: list[str]
+) -> InMetFeedManager:
+    """Return a feed manager registered with the feed."""
+    manager = InMetFeedManager(
+        feed, signals.generate, signals.update, signals.remove, city_codes
+    )
+    feed.register(manager)
+    return manager
+
+
+async def test_register_during_fetch(freezer: FrozenDateTimeFactory, signals) -> None:
+    """Test a manager registered while a fetch is in flight gets its alerts."""
+    freezer.move_to(NOW)
+    api = FakeApi(feed_payload())
+    feed = InMetFeed(api, RetryPolicy(attempts=1))
+    campinas = subscriber(feed, signals, ["3509502"])
+
+    api.resume.clear()
+    update = asyncio.create_task(campinas.update())
+    await api.streaming.wait()
+    # The body in flight is only filtered for the alerts of Campinas.
+    sao_paulo = subscriber(feed, signals, ["3550308"])
+    api.resume.set()
+    await sao_paulo.update()
+    await update
+
+    assert api.requests == 2
+    assert [alert["id"] for alert in campinas.alerts()] == [1, 2]
+    assert [alert["id"] for alert in sao_paulo.alerts()] == [1]
+
+    # The held index covers both managers.
+    await sao_paulo.update()
+    assert api.requests == 2
+
+    campinas.stop()
+    sao_paulo.stop()
+
+
+async def test_register_drops_index(freezer: FrozenDateTimeFactory, signals) -> None:
+    """Test the held index is dropped for a manager it does not cover."""
+    freezer.move_to(NOW)
+    api = FakeApi(feed_payload())
+    feed = InMetFeed(api, RetryPolicy(attempts=1))
+    campinas = subscriber(feed, signals, ["3509502"])
+    await campinas.update()
+    assert feed.index is not None
+
+    subscriber(feed, signals, ["3509502"]).stop()
+    assert feed.index is not None
+
+    sao_paulo = subscriber(feed, signals, ["3550308"])
+    assert feed.index is None
+    await sao_paulo.update()
+
+    assert api.requests == 2
+    assert [alert["id"] for alert in sao_paulo.alerts()] == [1]
+
+    campinas.stop()
+    sao_paulo.stop()
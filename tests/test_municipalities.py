@@ -0,0 +1,104 @@
+"""Tests for the offline municipality search."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.inmet.municipalities import (
+    MunicipalityIndex,
+    load_municipality_index,
+    normalize,
+    starts_with,
+)
+
+MUNICIPALITIES = [
+    [3509502, "Campinas", "SP", -22.9053, -47.0659, 1031554],
+    [4303509, "Campinas do Sul", "RS", -27.7174, -52.6248, 5519],
+    [3509007, "Campanha", "MG", -21.8397, -45.4006, 14000],
+    [4216602, "São José", "SC", -27.6136, -48.6366, 209804],
+    [3549904, "São José dos Campos", "SP", -23.1896, -45.8841, 697054],
+    [4125506, "São José dos Pinhais", "PR", -25.5313, -49.2031, 329058],
+    [3162955, "São José da Lapa", "MG", -19.6971, -43.9586, 19799],
+    [3305133, "São José de Ubá", "RJ", -21.3661, -41.9511, 7003],
+    [3518701, "Guarujá", "SP", -23.9888, -46.2580, 290752],
+    [3550308, "São Paulo", "SP", -23.5329, -46.6395, 12400232],
+    [3547304, "Santa Bárbara d'Oeste", "SP", -22.7553, -47.4143, 180009],
+]
+
+
+@pytest.fixture
+def index() -> MunicipalityIndex:
+    """Return an index over a few municipalities."""
+    return MunicipalityIndex(MUNICIPALITIES)
+
+
+def labels(cities: list[dict]) -> list[str]:
+    """Return the labels of the found cities."""
+    return [city["label"] for city in cities]
+
+
+@pytest.mark.parametrize(
+    ("name", "normalized"),
+    [
+        ("São José", "sao jose"),
+        ("  SÃO   PAULO ", "sao paulo"),
+        ("Santa Bárbara d'Oeste", "santa barbara d oeste"),
+    ],
+)
+def test_normalize(name: str, normalized: str) -> None:
+    """Test accents, case and punctuation are folded."""
+    assert normalize(name) == normalized
+
+
+def test_starts_with() -> None:
+    """Test a label starts with a searched name, once normalized."""
+    assert starts_with("São José dos Campos - SP", "sao jose")
+    assert not starts_with("São José dos Campos - SP", "campos")
+    assert not starts_with("São José - SC", "  ")
+
+
+def test_search_accents(index: MunicipalityIndex) -> None:
+    """Test names match without their accents."""
+    assert labels(index.search("guaruja", 5)) == ["Guarujá - SP"]
+    assert labels(index.search("SANTA BARBARA D OESTE", 5)) == [
+        "Santa Bárbara d'Oeste - SP"
+    ]
+
+
+def test_search_prefix_by_population(index: MunicipalityIndex) -> None:
+    """Test the exact name comes first, then names starting the same by size."""
+    assert labels(index.search("Sao Jose", 5)) == [
+        "São José - SC",
+        "São José dos Campos - SP",
+        "São José dos Pinhais - PR",
+        "São José da Lapa - MG",
+        "São José de Ubá - RJ",
+    ]
+
+
+def test_search_words(index: MunicipalityIndex) -> None:
+    """Test the query words may start the words of the name."""
+    assert labels(index.search("jose campos", 1)) == ["São José dos Campos - SP"]
+
+
+def test_search_typo(index: MunicipalityIndex) -> None:
+    """Test a typo still finds the closest name first."""
+    assert labels(index.search("campnas", 2)) == [
+        "Campinas - SP",
+        "Campinas do Sul - RS",
+    ]
+
+
+def test_search_no_match(index: MunicipalityIndex) -> None:
+    """Test unrelated or empty queries find nothing."""
+    assert index.search("xyzw", 5) == []
+    assert index.search("!!", 5) == []
+
+
+def test_search_bundled_dataset() -> None:
+    """Test the bundled dataset ranks the larger namesakes first."""
+    index = load_municipality_index()
+
+    assert len(index) == 5570
+    assert "São José dos Campos - SP" in labels(index.search("Sao Jose", 5))
+    assert labels(index.search("campinas", 1)) == ["Campinas - SP"]
@@ -0,0 +1,175 @@
+"""Tests for the InMet retry policy and circuit breaker."""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+from custom_components.inmet.feed_manager import InMetFeed
+from custom_components.inmet.retry import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    RetryPolicy,
+)
+
+
+class FakeTimer:
+    """Clock advanced by hand."""
+
+    def __init__(self) -> None:
+        """Start the clock."""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+class FakeResponse:
+    """Response with a status and no body."""
+
+    def __init__(self, status: int) -> None:
+        """Initialize the response."""
+        self.status = status
+        self.headers: dict[str, str] = {}
+
+
+class FakeApi:
+    """API client answering every request with the given statuses."""
+
+    def __init__(self, *statuses: int) -> None:
+        """Initialize the client."""
+        self._statuses = list(statuses)
+        self.requests = 0
+
+    @asynccontextmanager
+    async def get(self, path: str, **kwargs):
+        """Return the next response."""
+        self.requests += 1
+        yield FakeResponse(self._statuses.pop(0))
+
+
+@pytest.mark.parametrize(
+    ("retry", "delay"), [(0, 2.0), (1, 4.0), (2, 8.0), (3, 16.0), (4, 30.0), (10, 30.0)]
+)
+def test_retry_delay(retry: int, delay: float) -> None:
+    """Test the delay doubles up to the cap, scaled by the jitter."""
+    assert RetryPolicy(jitter=lambda: 1.0).delay(retry) == delay
+    assert RetryPolicy(jitter=lambda: 0.5).delay(retry) == delay / 2
+    assert RetryPolicy(jitter=lambda: 0.0).delay(retry) == 0
+
+
+def test_retry_attempts() -> None:
+    """Test at least one attempt is made."""
+    assert RetryPolicy(attempts=0).attempts == 1
+
+
+def test_circuit_threshold() -> None:
+    """Test the circuit opens after the threshold of consecutive failures."""
+    timer = FakeTimer()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=300, timer=timer)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.allow_request()
+    assert breaker.retry_in() is None
+
+    # A success in between starts the count again.
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_in() == 300
+    assert breaker.failures == 3
+
+    timer.now += 299
+    assert breaker.retry_in() == 1
+    timer.now += 1
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow_request()
+    assert breaker.retry_in() is None
+
+
+def test_circuit_half_open_doubling() -> None:
+    """Test a failed trial poll reopens the circuit for twice as long."""
+    timer = FakeTimer()
+    breaker = CircuitBreaker(
+        failure_threshold=1, reset_timeout=300, max_reset_timeout=1000, timer=timer
+    )
+
+    breaker.record_failure()
+    for reset_timeout in (600, 1000, 1000):
+        timer.now += breaker.retry_in()
+        assert breaker.state == CIRCUIT_HALF_OPEN
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+        assert breaker.retry_in() == reset_timeout
+
+    # A successful trial closes the circuit and resets the timeout.
+    timer.now += breaker.retry_in()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.failures == 0
+    breaker.record_failure()
+    assert breaker.retry_in() == 300
+
+
+async def test_fetch_retries_server_errors() -> None:
+    """Test 5xx responses are retried until an attempt succeeds."""
+    api = FakeApi(503, 500, 304)
+    breaker = CircuitBreaker(failure_threshold=1)
+    feed = InMetFeed(api, RetryPolicy(attempts=3, jitter=lambda: 0), breaker)
+
+    await feed.update()
+
+    assert api.requests == 3
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+async def test_fetch_gives_up_after_attempts() -> None:
+    """Test a poll fails once every attempt failed."""
+    api = FakeApi(503, 502, 500)
+    breaker = CircuitBreaker(failure_threshold=1)
+    feed = InMetFeed(api, RetryPolicy(attempts=3, jitter=lambda: 0), breaker)
+
+    await feed.update()
+
+    assert api.requests == 3
+    assert breaker.state == CIRCUIT_OPEN
+
+    # The open circuit skips the next poll altogether.
+    await feed.update()
+    assert api.requests == 3
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+async def test_fetch_does_not_retry_client_errors(status: int) -> None:
+    """Test 4xx responses fail the poll without further attempts."""
+    api = FakeApi(status, 304)
+    breaker = CircuitBreaker()
+    feed = InMetFeed(api, RetryPolicy(attempts=3, jitter=lambda: 0), breaker)
+
+    await feed.update()
+
+    assert api.requests == 1
+    assert breaker.failures == 1
+
+
+@pytest.mark.parametrize("status", [408, 429])
+async def test_fetch_retries_throttling(status: int) -> None:
+    """Test timeouts and throttling are retried like server errors."""
+    api = FakeApi(status, 304)
+    feed = InMetFeed(api, RetryPolicy(attempts=3, jitter=lambda: 0))
+
+    await feed.update()
+
+    assert api.requests == 2
+    assert feed.circuit_breaker.failures == 0
@@ -0,0 +1,278 @@
+"""Tests for the incremental decoding of the InMet feed."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from custom_components.inmet import stream
+from custom_components.inmet.stream import (
+    AlertStreamParser,
+    GeocodeFilter,
+    async_parse_alerts,
+)
+
+PAYLOAD = {
+    "hoje": [
+        {
+            "id": 1,
+            "descricao": "Tempestade",
+            "geocodes": "3509502,3550308",
+            "riscos": ["Queda de árvores"],
+            "alterado": False,
+            "sequencia": None,
+        },
+        {"id": 2, "descricao": "Chuvas Intensas", "geocodes": "4106902", "x": 1.5e3},
+        {"id": 3, "descricao": "Onda de Calor", "geocodes": "1350001,5300108"},
+    ],
+    "futuro": [
+        {"id": 4, "descricao": "Baixa Umidade", "geocodes": "3550308,5300108"},
+        {"id": 5, "descricao": "Acumulado de Chuva", "geocodes": "4314902"},
+    ],
+    "atualizado": "2024-01-10 12:00",
+    "total": 5,
+}
+
+ALERTS = PAYLOAD["hoje"] + PAYLOAD["futuro"]
+
+
+def filtered(keep) -> dict:
+    """Return the payload with the alerts kept by a filter."""
+    return {
+        **PAYLOAD,
+        "hoje": [alert for alert in PAYLOAD["hoje"] if keep(alert)],
+        "futuro": [alert for alert in PAYLOAD["futuro"] if keep(alert)],
+    }
+
+
+def parse(text: str, size: int, keep=lambda alert: True) -> AlertStreamParser:
+    """Parse a text in chunks of the given size."""
+    parser = AlertStreamParser(keep)
+    for start in range(0, len(text), size):
+        parser.feed(text[start : start + size])
+    parser.close()
+    return parser
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 100000])
+def test_parser_chunk_boundaries(indent: int | None, size: int) -> None:
+    """Test the payload decodes the same wherever the chunks are split."""
+    text = json.dumps(PAYLOAD, ensure_ascii=False, indent=indent)
+    keep = GeocodeFilter(["3550308"], [])
+
+    parser = parse(text, size, keep)
+
+    assert parser.payload == filtered(keep)
+    assert parser.scanned == len(ALERTS)
+
+
+def test_parser_number_at_chunk_end() -> None:
+    """Test a number is not cut short at the end of a chunk."""
+    parser = AlertStreamParser(lambda alert: True)
+    parser.feed('{"total": 12')
+    parser.feed('34, "hoje": []}')
+
+    assert parser.close() == {"total": 1234, "hoje": []}
+
+
+def test_parser_non_list_alerts() -> None:
+    """Test alert keys holding something else than a list are kept as is."""
+    parser = parse('{"hoje": null, "futuro": []}', 3)
+
+    assert parser.payload == {"hoje": None, "futuro": []}
+    assert parser.scanned == 0
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "",
+        '{"hoje": [{"id": 1}',
+        '{"hoje": [{"id": 1}], "futuro": [',
+        '{"hoje": []',
+    ],
+)
+def test_parser_truncated(text: str) -> None:
+    """Test a truncated feed is rejected."""
+    parser = AlertStreamParser(lambda alert: True)
+    parser.feed(text)
+
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+@pytest.mark.parametrize(
+    "text", ['{"hoje": []} {}', '{"hoje": []}]', '{"hoje": [] "futuro": []}']
+)
+def test_parser_extra_data(text: str) -> None:
+    """Test data after or between the feed values is rejected."""
+    parser = AlertStreamParser(lambda alert: True)
+
+    with pytest.raises(ValueError):
+        parser.feed(text)
+        parser.close()
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "[]",
+        '{"hoje": [{"id": }]}',
+        '{"hoje" []}',
+        '{"hoje": [{"id": 1} {"id": 2}]}',
+        '{"hoje": [{"id": 1},, {"id": 2}]}',
+        '{"hoje": [1]}',
+        "{1: []}",
+        '{"hoje": [], }',
+    ],
+)
+def test_parser_invalid(text: str) -> None:
+    """Test a malformed feed is rejected."""
+    parser = AlertStreamParser(lambda alert: True)
+
+    with pytest.raises(ValueError):
+        parser.feed(text)
+        parser.close()
+
+
+async def test_async_parse_alerts() -> None:
+    """Test the feed decodes from bytes split inside multibyte characters."""
+    data = json.dumps(PAYLOAD, ensure_ascii=False).encode()
+    position = data.index("á".encode()) + 1
+
+    async def chunks():
+        yield data[:position]
+        yield data[position:]
+
+    parser = await async_parse_alerts(chunks(), GeocodeFilter([], ["35"]))
+
+    assert parser.payload == filtered(lambda alert: alert["id"] in (1, 4))
+    assert parser.size == len(data)
+    assert parser.scanned == len(ALERTS)
+
+
+async def test_async_parse_alerts_off_loop() -> None:
+    """Test the alerts are decoded outside the event loop thread."""
+    threads = set()
+
+    def keep(alert: dict) -> bool:
+        threads.add(threading.get_ident())
+        return True
+
+    async def chunks():
+        yield json.dumps(PAYLOAD).encode()
+
+    parser = await async_parse_alerts(chunks(), keep)
+
+    assert parser.scanned == len(ALERTS)
+    assert threads and threading.get_ident() not in threads
+
+
+async def test_async_parse_alerts_rejected() -> None:
+    """Test the stream stops being read once the parser rejects it."""
+    read = []
+
+    async def chunks():
+        for chunk in (b"[", b"{}", b"{}", b"{}"):
+            read.append(chunk)
+            yield chunk
+            await asyncio.sleep(0.05)
+
+    with pytest.raises(ValueError):
+        await async_parse_alerts(chunks(), lambda alert: True)
+
+    assert len(read) < 4
+
+
+async def test_async_parse_alerts_backpressure() -> None:
+    """Test the stream is read no further ahead of the parser than allowed."""
+    resume = threading.Event()
+    read = []
+
+    def keep(alert: dict) -> bool:
+        resume.wait(5)
+        return True
+
+    async def chunks():
+        yield b'{"hoje": ['
+        for alert_id in range(20):
+            read.append(alert_id)
+            yield b'{"id": %d}, ' % alert_id
+        yield b'{"id": 20}]}'
+
+    parsing = asyncio.create_task(async_parse_alerts(chunks(), keep))
+    try:
+        await asyncio.sleep(0.1)
+        # The chunk being parsed, the queued ones and the one waiting a slot.
+        assert len(read) == stream.MAX_QUEUED_CHUNKS + 2
+    finally:
+        resume.set()
+    parser = await parsing
+
+    assert parser.scanned == 21
+
+
+async def test_async_parse_alerts_read_error() -> None:
+    """Test a failure reading the stream is raised, not a truncated feed."""
+
+    async def chunks():
+        yield b'{"hoje": ['
+        raise ConnectionResetError
+
+    with pytest.raises(ConnectionResetError):
+        await async_parse_alerts(chunks(), lambda alert: True)
+
+
+@pytest.mark.parametrize(
+    ("codes", "prefixes", "alert_ids"),
+    [
+        (["3550308"], [], [1, 4]),
+        (["3509502", "4106902"], [], [1, 2]),
+        (["5300108"], [], [3, 4]),
+        (["355030"], [], []),
+        ([], ["35"], [1, 4]),
+        ([], ["13", "43"], [3, 5]),
+        ([], ["350"], [1]),
+        (["4106902"], ["53"], [2, 3, 4]),
+        (["3550308"], ["35"], [1, 4]),
+        ([], ["3"], [1, 4]),
+        ([], [], []),
+    ],
+)
+@pytest.mark.parametrize("needles", [True, False])
+def test_geocode_filter(
+    monkeypatch: pytest.MonkeyPatch,
+    codes: list[str],
+    prefixes: list[str],
+    alert_ids: list[int],
+    needles: bool,
+) -> None:
+    """Test the substring and the set matching agree."""
+    if not needles:
+        monkeypatch.setattr(stream, "MAX_NEEDLES", -1)
+    keep = GeocodeFilter(codes, prefixes)
+
+    assert (keep._needles is not None) is needles
+    assert [alert["id"] for alert in ALERTS if keep(alert)] == alert_ids
+
+
+def test_geocode_filter_many_subscriptions() -> None:
+    """Test many subscriptions are matched as sets."""
+    keep = GeocodeFilter([f"35{number:05d}" for number in range(100)], ["53"])
+
+    assert keep._needles is None
+    assert [alert["id"] for alert in ALERTS if keep(alert)] == [3, 4]
+
+
+def test_geocode_filter_covers() -> None:
+    """Test a filter covers the codes and prefixes it matches."""
+    keep = GeocodeFilter(["4106902"], ["35"])
+
+    assert keep.covers(["4106902", "3509502"], ["35", "3509"])
+    assert not keep.covers(["4106903"], [])
+    assert not keep.covers([], ["3"])
+    assert not keep.covers([], ["41"])